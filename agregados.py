@@ -0,0 +1,44 @@
+import pandas as pd
+
+# Columnas de la tabla (ejercicio, location, día) -> estadísticas de los sets al peso máximo
+COLUMNAS_MAX_POR_DIA = ["ejercicio", "location", "fecha_dia", "kilos_max", "reps_min", "reps_max", "reps_mean"]
+LLAVES_MAX_POR_DIA = ["ejercicio", "location", "fecha_dia"]
+
+
+# Función para calcular, en una sola pasada vectorizada, el peso máximo por día de todos los ejercicios
+def calcular_max_por_dia(df):
+    if df.empty:
+        return pd.DataFrame(columns=COLUMNAS_MAX_POR_DIA)
+
+    df = df[["ejercicio", "location", "fecha", "kilos", "reps"]].copy()
+    df["fecha_dia"] = pd.to_datetime(df["fecha"]).dt.normalize()
+
+    # Quedarnos solo con los sets que alcanzaron el peso máximo de su (ejercicio, lugar, día)
+    max_kilos_por_dia = df.groupby(LLAVES_MAX_POR_DIA)["kilos"].transform("max")
+    df_sets_max = df[df["kilos"] == max_kilos_por_dia]
+
+    return df_sets_max.groupby(LLAVES_MAX_POR_DIA).agg(
+        kilos_max=("kilos", "first"),
+        reps_min=("reps", "min"),
+        reps_max=("reps", "max"),
+        reps_mean=("reps", "mean")
+    ).reset_index()[COLUMNAS_MAX_POR_DIA]
+
+
+# Función para actualizar el agregado por mes del almacén: un día nunca cruza de mes, así que cada mes se agrega por
+# separado y se reutiliza mientras sus archivos no cambien (un set nuevo, una corrección, una baja o una compactación
+# solo reescriben su mes). El estado es {mes: (archivos, tabla)}; solo se leen los meses pedidos que son nuevos o
+# cambiaron, con cargar_mes(mes)
+def actualizar_max_por_dia(estado, particiones, cargar_mes, meses=None):
+    estado = {mes: valor for mes, valor in (estado or {}).items() if mes in particiones}
+    for mes in (particiones if meses is None else meses):
+        archivos = tuple(particiones.get(mes, ()))
+        if archivos and (mes not in estado or estado[mes][0] != archivos):
+            estado[mes] = (archivos, calcular_max_por_dia(cargar_mes(mes)))
+    return estado
+
+
+# Función para juntar las tablas de los meses pedidos (todos si es None)
+def tabla_max_por_dia(estado, meses=None):
+    tablas = [tabla for mes, (_, tabla) in sorted(estado.items()) if (meses is None or mes in meses) and not tabla.empty]
+    return pd.concat(tablas, ignore_index=True) if tablas else pd.DataFrame(columns=COLUMNAS_MAX_POR_DIA)
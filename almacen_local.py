@@ -0,0 +1,160 @@
+import hashlib
+import os
+import shutil
+import uuid
+import pandas as pd
+
+from bloqueos import bloqueo_archivo
+
+# Almacén local del registro de entrenamientos: archivos parquet particionados por mes
+DIRECTORIO_ALMACEN = os.path.join("datos_locales", "entrenamientos")
+COLUMNAS_REGISTRO = ["fecha", "grupo", "ejercicio", "set", "kilos", "libras", "reps", "location"]
+# Archivos que puede acumular un mes (uno por sincronización con altas) antes de compactarlo
+MAXIMO_ARCHIVOS_POR_MES = 8
+# Quien escribe (agrega, compacta, quita o reescribe archivos) toma este bloqueo exclusivo y quien consulta lo toma
+# compartido, así una consulta nunca lista un archivo que se borra antes de leerlo
+ARCHIVO_BLOQUEO = "_almacen.lock"
+
+
+# Función para normalizar un DataFrame al esquema del registro (mismas columnas y tipos que "Hoja 1").
+# Si trae la columna "id" de la bitácora se conserva
+def normalizar_registros(df):
+    df = df.reindex(columns=COLUMNAS_REGISTRO + (["id"] if "id" in df.columns else [])).copy()
+    df["fecha"] = pd.to_datetime(df["fecha"]).dt.normalize()
+    for columna in ["set", "kilos", "libras", "reps"]:
+        df[columna] = pd.to_numeric(df[columna], errors="coerce")
+    for columna in ["grupo", "ejercicio", "location"]:
+        df[columna] = df[columna].fillna("").astype(str).str.strip()
+    return df
+
+
+# Función para calcular el hash de contenido de cada fila (vectorizado, estable entre ejecuciones)
+def hash_registros(df):
+    df = normalizar_registros(df.drop(columns="id", errors="ignore"))
+    df["fecha"] = df["fecha"].dt.strftime("%Y-%m-%d")
+    for columna in ["set", "kilos", "libras", "reps"]:
+        df[columna] = df[columna].astype(float).round(1)
+    return pd.util.hash_pandas_object(df, index=False)
+
+
+# Función para guardar registros en el almacén; cada mes recibe un archivo nuevo y, cuando un mes junta más de
+# MAXIMO_ARCHIVOS_POR_MES archivos, se compacta en uno solo
+def guardar_registros(df, directorio=DIRECTORIO_ALMACEN):
+    with _bloqueo(directorio):
+        return _escribir_registros(df, directorio)
+
+
+def _bloqueo(directorio, compartido=False):
+    return bloqueo_archivo(os.path.join(directorio, ARCHIVO_BLOQUEO), compartido)
+
+
+def _escribir_registros(df, directorio):
+    if df.empty:
+        return 0
+    df = normalizar_registros(df)
+    for mes, df_mes in df.groupby(df["fecha"].dt.strftime("%Y-%m")):
+        carpeta = os.path.join(directorio, f"mes={mes}")
+        os.makedirs(carpeta, exist_ok=True)
+        df_mes.to_parquet(os.path.join(carpeta, f"parte-{uuid.uuid4().hex}.parquet"), index=False)
+        compactar_mes(carpeta)
+    return len(df)
+
+
+# Función para reescribir los archivos de un mes en uno solo (sin ids repetidos); primero se escribe el archivo
+# nuevo y después se borran los anteriores, así nunca se pierden filas aunque se interrumpa. Se llama con el
+# bloqueo del almacén tomado
+def compactar_mes(carpeta, maximo_archivos=None):
+    maximo_archivos = MAXIMO_ARCHIVOS_POR_MES if maximo_archivos is None else maximo_archivos
+    archivos = [os.path.join(carpeta, archivo) for archivo in sorted(os.listdir(carpeta)) if archivo.endswith(".parquet")]
+    if len(archivos) <= maximo_archivos:
+        return False
+    df_mes = pd.concat([pd.read_parquet(archivo) for archivo in archivos], ignore_index=True)
+    if "id" in df_mes.columns:
+        df_mes = df_mes.drop_duplicates("id")
+    df_mes.sort_values("fecha", kind="stable").to_parquet(
+        os.path.join(carpeta, f"parte-{uuid.uuid4().hex}.parquet"), index=False
+    )
+    for archivo in archivos:
+        os.remove(archivo)
+    return True
+
+
+# Función para listar los archivos del almacén agrupados por mes
+def listar_particiones(directorio=DIRECTORIO_ALMACEN):
+    if not os.path.isdir(directorio):
+        return {}
+    particiones = {}
+    for carpeta in sorted(os.listdir(directorio)):
+        if not carpeta.startswith("mes="):
+            continue
+        ruta = os.path.join(directorio, carpeta)
+        particiones[carpeta[len("mes="):]] = [
+            os.path.join(ruta, archivo) for archivo in sorted(os.listdir(ruta)) if archivo.endswith(".parquet")
+        ]
+    return particiones
+
+
+# Función para obtener la versión del almacén: cambia cada vez que se agrega o reescribe un archivo
+def version_almacen(directorio=DIRECTORIO_ALMACEN):
+    archivos = [os.path.basename(archivo) for archivos in listar_particiones(directorio).values() for archivo in archivos]
+    return hashlib.sha1("|".join(sorted(archivos)).encode()).hexdigest()
+
+
+# Función para consultar el almacén empujando los filtros a la capa de datos:
+# los meses fuera del rango ni se abren y el resto de filtros se aplica al leer cada parquet
+def consultar_registros(fecha_inicio=None, fecha_fin=None, grupo=None, location=None, ejercicios=None,
+                        columnas=None, directorio=DIRECTORIO_ALMACEN):
+    columnas = list(columnas) if columnas is not None else COLUMNAS_REGISTRO
+    if (ejercicios is not None and len(ejercicios) == 0) or not os.path.isdir(directorio):
+        return pd.DataFrame(columns=columnas)
+
+    fecha_inicio = pd.to_datetime(fecha_inicio) if fecha_inicio is not None else None
+    fecha_fin = pd.to_datetime(fecha_fin) if fecha_fin is not None else None
+    mes_inicio = fecha_inicio.strftime("%Y-%m") if fecha_inicio is not None else None
+    mes_fin = fecha_fin.strftime("%Y-%m") if fecha_fin is not None else None
+
+    filtros = []
+    if fecha_inicio is not None:
+        filtros.append(("fecha", ">=", fecha_inicio))
+    if fecha_fin is not None:
+        filtros.append(("fecha", "<=", fecha_fin))
+    if grupo is not None:
+        filtros.append(("grupo", "==", grupo))
+    if location is not None:
+        filtros.append(("location", "==", location))
+    if ejercicios is not None:
+        filtros.append(("ejercicio", "in", list(ejercicios)))
+
+    with _bloqueo(directorio, compartido=True):
+        archivos = [
+            archivo
+            for mes, archivos_mes in listar_particiones(directorio).items()
+            if (mes_inicio is None or mes >= mes_inicio) and (mes_fin is None or mes <= mes_fin)
+            for archivo in archivos_mes
+        ]
+        if not archivos:
+            return pd.DataFrame(columns=columnas)
+        partes = [pd.read_parquet(archivo, columns=columnas, filters=filtros or None) for archivo in archivos]
+    df = pd.concat(partes, ignore_index=True)
+    if "fecha" in df.columns:
+        df = df.sort_values("fecha", kind="stable").reset_index(drop=True)
+    return df
+
+
+# Función para reemplazar todo el contenido del almacén
+def reescribir_registros(df, directorio=DIRECTORIO_ALMACEN):
+    with _bloqueo(directorio):
+        for mes in listar_particiones(directorio):
+            shutil.rmtree(os.path.join(directorio, f"mes={mes}"))
+        return _escribir_registros(df, directorio)
+
+
+# Función para quitar filas por id reescribiendo solo los meses donde estaban
+def quitar_registros(ids, meses, directorio=DIRECTORIO_ALMACEN):
+    ids = set(ids)
+    with _bloqueo(directorio):
+        particiones = listar_particiones(directorio)
+        for mes in sorted(set(meses) & set(particiones)):
+            df_mes = pd.concat([pd.read_parquet(archivo) for archivo in particiones[mes]], ignore_index=True)
+            shutil.rmtree(os.path.join(directorio, f"mes={mes}"))
+            _escribir_registros(df_mes[~df_mes["id"].isin(ids)], directorio)
@@ -0,0 +1,204 @@
+import json
+import os
+import time
+import uuid
+import pandas as pd
+
+from almacen_local import (
+    COLUMNAS_REGISTRO, DIRECTORIO_ALMACEN, guardar_registros, hash_registros, normalizar_registros,
+    quitar_registros, reescribir_registros
+)
+from bloqueos import bloqueo_archivo
+
+# Bitácora de eventos del registro de entrenamientos (parquet, solo se agrega): cada fila de "Hoja 1" tiene un id
+# estable = hash de contenido + secuencia entre los sets idénticos del mismo día (el hash ya incluye la fecha).
+# Sincronizar, deshacer e importar se resuelven comparando ids en vez de comparar tablas completas.
+DIRECTORIO_BITACORA = os.path.join("datos_locales", "bitacora")
+ARCHIVO_SINCRONIZACION = "_sincronizacion.json"
+ARCHIVO_BLOQUEO = "_sincronizacion.lock"
+PREFIJO_VIGENTES = "_vigentes-"  # Foto de los ids vigentes: _vigentes-<versión de la bitácora>
+# Archivos de eventos que puede acumular la bitácora antes de compactarla en uno solo
+MAXIMO_ARCHIVOS_BITACORA = 32
+COLUMNAS_BITACORA = ["id", "evento", "momento"] + COLUMNAS_REGISTRO
+
+
+def _hash_hex(df):
+    return hash_registros(df).reset_index(drop=True).map("{:016x}".format).astype(str)
+
+
+# Función para calcular el id de cada fila, en el orden de la hoja. "previos" cuenta cuántas filas idénticas
+# (por hash) hay antes de este bloque, para que las secuencias continúen donde se quedaron
+def ids_registros(df, previos=None):
+    hashes = _hash_hex(df)
+    secuencia = hashes.groupby(hashes).cumcount()
+    if previos is not None:
+        secuencia += hashes.map(previos).fillna(0).astype(int)
+    return hashes + "-" + secuencia.astype(str)
+
+
+# Cuántas filas hay de cada hash entre los ids dados (para pasarlo como "previos")
+def conteo_hashes(ids):
+    return pd.Series(ids, dtype=str).str.split("-").str[0].value_counts()
+
+
+def _archivos_bitacora(directorio):
+    return sorted(archivo for archivo in os.listdir(directorio) if archivo.startswith("parte-")) if os.path.isdir(directorio) else []
+
+
+# Función para agregar eventos ("alta" o "baja", ambos con la fila completa y su id) en un archivo nuevo;
+# los nombres empiezan con la hora para que el orden de los archivos sea el orden de los eventos
+def registrar_eventos(evento, df, directorio=DIRECTORIO_BITACORA):
+    if df.empty:
+        return 0
+    eventos = normalizar_registros(df).assign(evento=evento, momento=pd.Timestamp.now())[COLUMNAS_BITACORA]
+    os.makedirs(directorio, exist_ok=True)
+    eventos.to_parquet(os.path.join(directorio, f"parte-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"), index=False)
+    compactar_bitacora(directorio)
+    return len(eventos)
+
+
+# Función para juntar los archivos de eventos en uno solo cuando pasan de MAXIMO_ARCHIVOS_BITACORA. El archivo
+# compactado reemplaza al más reciente (conserva su nombre, así la versión no cambia) y después se borran los
+# anteriores; si alguien lee a la mitad ve eventos repetidos en el mismo orden, que no cambian el último de cada id
+def compactar_bitacora(directorio=DIRECTORIO_BITACORA, maximo_archivos=None):
+    maximo_archivos = MAXIMO_ARCHIVOS_BITACORA if maximo_archivos is None else maximo_archivos
+    archivos = _archivos_bitacora(directorio)
+    if len(archivos) <= maximo_archivos:
+        return False
+    eventos = pd.concat([pd.read_parquet(os.path.join(directorio, archivo)) for archivo in archivos], ignore_index=True)
+    temporal = os.path.join(directorio, f"_compactando-{uuid.uuid4().hex[:8]}.parquet")
+    eventos.to_parquet(temporal, index=False)
+    os.replace(temporal, os.path.join(directorio, archivos[-1]))
+    for archivo in archivos[:-1]:
+        os.remove(os.path.join(directorio, archivo))
+    return True
+
+
+# Función para leer todos los eventos en orden; si una compactación borra un archivo a la mitad se vuelve a listar
+def leer_bitacora(columnas=None, directorio=DIRECTORIO_BITACORA, intentos=3):
+    columnas = list(columnas) if columnas is not None else COLUMNAS_BITACORA
+    for intento in range(intentos):
+        archivos = _archivos_bitacora(directorio)
+        if not archivos:
+            return pd.DataFrame(columns=columnas)
+        try:
+            return pd.concat([pd.read_parquet(os.path.join(directorio, archivo), columns=columnas) for archivo in archivos],
+                             ignore_index=True)
+        except FileNotFoundError:
+            if intento == intentos - 1:
+                raise
+
+
+# Función para obtener las filas vigentes: las que tienen un "alta" como último evento
+def registros_vigentes(directorio=DIRECTORIO_BITACORA):
+    eventos = leer_bitacora(directorio=directorio)
+    ultimos = eventos.drop_duplicates("id", keep="last")
+    return ultimos[ultimos["evento"] == "alta"][["id"] + COLUMNAS_REGISTRO].reset_index(drop=True)
+
+
+# Función para obtener solo los ids vigentes. Se guardan en una foto junto a _sincronizacion.json con la versión de
+# la bitácora a la que corresponden; los eventos completos solo se vuelven a leer si la bitácora avanzó por otro lado
+# (p. ej. una importación sin hoja)
+def ids_vigentes(directorio=DIRECTORIO_BITACORA):
+    version = version_bitacora(directorio)
+    if version is None:
+        return pd.Series(dtype=str, name="id")
+    try:
+        return pd.read_parquet(os.path.join(directorio, PREFIJO_VIGENTES + version))["id"]
+    except FileNotFoundError:
+        ids = registros_vigentes(directorio)["id"]
+        _guardar_ids_vigentes(directorio, ids, version)
+        return ids
+
+
+def _guardar_ids_vigentes(directorio, ids, version):
+    temporal = os.path.join(directorio, f"_vigentes_temporal-{uuid.uuid4().hex[:8]}.parquet")
+    pd.DataFrame({"id": pd.Series(ids, dtype=str).values}).to_parquet(temporal, index=False)
+    os.replace(temporal, os.path.join(directorio, PREFIJO_VIGENTES + version))
+    for archivo in os.listdir(directorio):
+        if archivo.startswith(PREFIJO_VIGENTES) and archivo != PREFIJO_VIGENTES + version:
+            try:
+                os.remove(os.path.join(directorio, archivo))
+            except FileNotFoundError:
+                pass  # Otra sesión ya la borró
+
+
+# Versión de la bitácora para invalidar cachés: cambia con cada evento registrado
+def version_bitacora(directorio=DIRECTORIO_BITACORA):
+    archivos = _archivos_bitacora(directorio)
+    return archivos[-1] if archivos else None
+
+
+# Bloqueo de la bitácora: todo lo que registra eventos (sincronizar, importar) lo toma para que la foto de ids
+# vigentes y la compactación no se crucen con otra escritura
+def bloqueo_bitacora(directorio=DIRECTORIO_BITACORA):
+    return bloqueo_archivo(os.path.join(directorio, ARCHIVO_BLOQUEO))
+
+
+def _leer_estado_sincronizacion(directorio):
+    ruta = os.path.join(directorio, ARCHIVO_SINCRONIZACION)
+    if not os.path.exists(ruta):
+        return {"filas": 0, "ultimo_hash": None}
+    with open(ruta) as archivo:
+        return json.load(archivo)
+
+
+def _guardar_estado_sincronizacion(directorio, estado):
+    os.makedirs(directorio, exist_ok=True)
+    with open(os.path.join(directorio, ARCHIVO_SINCRONIZACION), "w") as archivo:
+        json.dump(estado, archivo)
+
+
+def _a_registros(valores):
+    valores = [fila + [""] * (len(COLUMNAS_REGISTRO) - len(fila)) for fila in valores]
+    return pd.DataFrame(valores, columns=COLUMNAS_REGISTRO)
+
+
+# Función para traer al almacén los cambios de "Hoja 1" (la hoja es la fuente de verdad). Se lee desde la última fila
+# ya sincronizada: si sigue igual y no hay filas nuevas no se lee nada más; si hay nuevas solo se agregan, contando
+# las secuencias con la foto de ids vigentes; si cambió (p. ej. "Eliminar Último" seguido de otro registro) se
+# comparan los ids de toda la hoja contra la bitácora y solo se reescriben los meses afectados
+def sincronizar_con_hoja(worksheet, directorio=DIRECTORIO_ALMACEN, directorio_bitacora=DIRECTORIO_BITACORA):
+    with bloqueo_bitacora(directorio_bitacora):  # Una sincronización a la vez
+        estado = _leer_estado_sincronizacion(directorio_bitacora)
+        desde = estado["filas"]
+        continua = False
+        if desde:
+            valores = worksheet.get(f"A{desde + 1}:H")  # Última fila ya sincronizada + las nuevas
+            ancla = _a_registros(valores[:1])
+            continua = not ancla.empty and _hash_hex(ancla).iloc[0] == estado["ultimo_hash"]
+            if continua and len(valores) == 1:
+                return desde  # Nada nuevo en la hoja
+
+        if continua:
+            vigentes = ids_vigentes(directorio_bitacora)
+            nuevas = _a_registros(valores[1:])
+            nuevas["id"] = ids_registros(nuevas, conteo_hashes(vigentes)).values
+            # Por si alguna ya tenía alta (p. ej. importada solo al almacén local), no se repite
+            altas = nuevas[~nuevas["id"].isin(vigentes)].drop_duplicates("id")
+            if not altas.empty:
+                registrar_eventos("alta", altas, directorio_bitacora)
+                guardar_registros(altas, directorio)
+                _guardar_ids_vigentes(directorio_bitacora, pd.concat([vigentes, altas["id"]]), version_bitacora(directorio_bitacora))
+            total = desde + len(nuevas)
+            ultima = _a_registros(valores[-1:])
+        else:
+            vigentes = registros_vigentes(directorio_bitacora)
+            hoja = _a_registros(worksheet.get_all_values()[1:])
+            hoja["id"] = ids_registros(hoja).values
+            bajas = vigentes[~vigentes["id"].isin(hoja["id"])]
+            altas = hoja[~hoja["id"].isin(vigentes["id"])]
+            registrar_eventos("baja", bajas, directorio_bitacora)
+            registrar_eventos("alta", altas, directorio_bitacora)
+            if desde:
+                quitar_registros(bajas["id"], pd.to_datetime(bajas["fecha"]).dt.strftime("%Y-%m"), directorio)
+                guardar_registros(altas, directorio)
+            else:
+                reescribir_registros(hoja, directorio)  # Primera sincronización: el almacén se reconstruye ya con ids
+            if not (altas.empty and bajas.empty):
+                _guardar_ids_vigentes(directorio_bitacora, hoja["id"], version_bitacora(directorio_bitacora))
+            total = len(hoja)
+            ultima = hoja.tail(1)
+
+        _guardar_estado_sincronizacion(directorio_bitacora, {"filas": total, "ultimo_hash": _hash_hex(ultima).iloc[0] if total else None})
+        return total
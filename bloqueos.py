@@ -0,0 +1,36 @@
+import fcntl
+import os
+import threading
+from contextlib import contextmanager
+
+# Bloqueos para las sincronizaciones con las hojas: un candado por archivo para las sesiones de este proceso y
+# flock sobre el mismo archivo para las de otros procesos. Sin esto dos sesiones leen el mismo estado y agregan
+# las mismas filas dos veces. Con compartido=True varios lectores entran a la vez, pero nunca junto con un escritor
+
+_candados = {}
+_candado_candados = threading.Lock()
+
+
+@contextmanager
+def bloqueo_archivo(ruta, compartido=False):
+    ruta = os.path.abspath(ruta)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    if compartido:
+        # Lectores: flock compartido sobre su propio descriptor (flock es por descriptor abierto, así que también
+        # espera a un escritor de este mismo proceso). No tomarlo mientras se tiene el exclusivo de la misma ruta
+        with open(ruta, "a") as archivo:
+            fcntl.flock(archivo, fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(archivo, fcntl.LOCK_UN)
+        return
+
+    with _candado_candados:
+        candado = _candados.setdefault(ruta, threading.Lock())
+    with candado, open(ruta, "w") as archivo:
+        fcntl.flock(archivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(archivo, fcntl.LOCK_UN)
@@ -0,0 +1,81 @@
+import sys
+import threading
+
+import pandas as pd
+from cachetools import LRUCache
+
+# Caché de resultados derivados (textos de resumen, gráficas en PNG, tablas agregadas) compartido por todas las
+# sesiones del proceso. La llave es (vista, parámetros, versión de los datos): mientras no se registre nada nuevo
+# la versión no cambia y repetir un clic o un rerun no vuelve a calcular. Se desaloja por LRU según el tamaño en bytes.
+TAMANO_MAXIMO_BYTES = 64 * 1024 * 1024
+
+_SIN_VALOR = object()
+
+
+# Tamaño aproximado en memoria de un resultado, para el límite en bytes del LRU
+def tamano_resultado(valor):
+    if isinstance(valor, (bytes, bytearray)):
+        return len(valor)
+    if isinstance(valor, str):
+        return len(valor.encode("utf-8"))
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamano_resultado(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(tamano_resultado(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+# Huella de un DataFrame para usarla como versión cuando los datos no tienen una propia (p. ej. lo leído de la hoja)
+def huella_datos(df):
+    return len(df), int(pd.util.hash_pandas_object(df, index=False).sum())
+
+
+class CacheResultados:
+    def __init__(self, tamano_maximo=TAMANO_MAXIMO_BYTES):
+        self.cache = LRUCache(maxsize=tamano_maximo, getsizeof=tamano_resultado)
+        self.candado = threading.Lock()
+        self.aciertos = {}
+        self.fallos = {}
+
+    # Devuelve el resultado de la vista para esos parámetros y esa versión de los datos; si no está, lo calcula
+    # con "calcular" y lo guarda (si no cabe en el límite simplemente no se guarda)
+    def obtener(self, vista, parametros, version, calcular):
+        llave = (vista, parametros, version)
+        with self.candado:
+            valor = self.cache.get(llave, _SIN_VALOR)
+            contador = self.aciertos if valor is not _SIN_VALOR else self.fallos
+            contador[vista] = contador.get(vista, 0) + 1
+        if valor is not _SIN_VALOR:
+            return valor
+
+        valor = calcular()
+        with self.candado:
+            try:
+                self.cache[llave] = valor
+            except ValueError:
+                pass  # Más grande que todo el caché
+        return valor
+
+    def limpiar(self):
+        with self.candado:
+            self.cache.clear()
+
+    # Aciertos y fallos por vista, más la ocupación actual
+    def estadisticas(self):
+        with self.candado:
+            vistas = sorted(set(self.aciertos) | set(self.fallos), key=str)
+            tabla = pd.DataFrame({
+                "vista": [str(vista) for vista in vistas],
+                "aciertos": [self.aciertos.get(vista, 0) for vista in vistas],
+                "fallos": [self.fallos.get(vista, 0) for vista in vistas],
+            })
+            tabla["tasa_aciertos"] = (tabla["aciertos"] / (tabla["aciertos"] + tabla["fallos"])).round(3)
+            return tabla, {"entradas": len(self.cache), "bytes": int(self.cache.currsize), "bytes_maximo": int(self.cache.maxsize)}
+
+
+# Caché único del proceso (Streamlit importa este módulo una sola vez, así que sobrevive a los reruns)
+resultados = CacheResultados()
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import pandas as pd
+
+from bloqueos import bloqueo_archivo
+
+# Serie diaria que une calorías (spreadsheet_id_calorias) y peso (spreadsheet_id_peso) alineados por fecha
+ARCHIVO_DIARIO = os.path.join("datos_locales", "diario.parquet")
+ARCHIVO_ESTADO_DIARIO = os.path.join("datos_locales", "diario_hojas.json")  # Filas ya leídas de cada hoja
+COLUMNAS_HOJA_CALORIAS = ["Fecha", "Calorías"]
+COLUMNAS_HOJA_PESO = ["Fecha", "Porcentaje de grasa", "Peso en kg"]
+UMBRAL_CALORIAS_DIA = 1500  # Días por debajo de esto se consideran incompletos (igual que en los promedios semanales)
+KCAL_POR_KG = 7700
+VENTANA_PROMEDIO = 7
+VENTANA_TDEE = 14
+SEMANAS_CALORIAS = 8  # Semanas que se muestran por defecto en la tabla de calorías por semana
+COLUMNAS_BASE = ["calorias", "peso_kg", "grasa"]
+
+
+# Función para construir la serie diaria completa a partir de los DataFrames de ambas hojas
+def construir_diario(df_calorias, df_peso):
+    calorias = df_calorias.groupby(pd.to_datetime(df_calorias["Fecha"]).dt.normalize())["Calorías"].sum()
+    peso = df_peso.groupby(pd.to_datetime(df_peso["Fecha"]).dt.normalize())[["Peso en kg", "Porcentaje de grasa"]].mean()
+
+    diario = pd.concat([
+        calorias.rename("calorias"),
+        peso["Peso en kg"].rename("peso_kg"),
+        peso["Porcentaje de grasa"].rename("grasa"),
+    ], axis=1)
+    if diario.empty:
+        # Sin datos igual se derivan las columnas, para que quien lea la serie siempre encuentre las mismas
+        return _derivar(pd.DataFrame(columns=COLUMNAS_BASE, index=pd.DatetimeIndex([], name="fecha"), dtype=float))
+
+    diario = diario.reindex(pd.date_range(diario.index.min(), diario.index.max(), freq="D")).rename_axis("fecha")
+    return _derivar(diario)
+
+
+# Columnas derivadas: peso con forward-fill, promedios móviles, cambio semanal y TDEE estimado
+# (TDEE = calorías promedio - cambio de peso diario * 7700 kcal/kg)
+def _derivar(diario):
+    diario = diario[COLUMNAS_BASE].copy()
+    calorias_validas = diario["calorias"].where(diario["calorias"] > UMBRAL_CALORIAS_DIA)
+    peso = diario["peso_kg"].ffill()
+
+    diario["peso_ffill"] = peso
+    diario["calorias_prom_7d"] = calorias_validas.rolling(VENTANA_PROMEDIO, min_periods=1).mean()
+    diario["peso_prom_7d"] = peso.rolling(VENTANA_PROMEDIO, min_periods=1).mean()
+    diario["cambio_semanal_kg"] = diario["peso_prom_7d"].diff(VENTANA_PROMEDIO)
+    cambio_diario = diario["peso_prom_7d"].diff(VENTANA_TDEE) / VENTANA_TDEE
+    diario["tdee_estimado"] = calorias_validas.rolling(VENTANA_TDEE, min_periods=1).mean() - cambio_diario * KCAL_POR_KG
+    return diario
+
+
+# Función para registrar un dato nuevo sin releer las hojas: solo se recalculan los días afectados por las ventanas
+def actualizar_diario(diario, fecha, calorias=None, peso_kg=None, grasa=None):
+    dia = pd.Timestamp(fecha).normalize()
+    base = diario[COLUMNAS_BASE] if not diario.empty else pd.DataFrame(columns=COLUMNAS_BASE, dtype=float)
+    inicio = min(base.index.min(), dia) if not base.empty else dia
+    fin = max(base.index.max(), dia) if not base.empty else dia
+    base = base.reindex(pd.date_range(inicio, fin, freq="D")).rename_axis("fecha")
+
+    if calorias is not None:
+        base.loc[dia, "calorias"] = (0 if pd.isna(base.loc[dia, "calorias"]) else base.loc[dia, "calorias"]) + calorias
+    if peso_kg is not None:
+        base.loc[dia, "peso_kg"] = peso_kg
+    if grasa is not None:
+        base.loc[dia, "grasa"] = grasa
+
+    # Recalcular con el contexto suficiente para las ventanas y copiar solo los días desde el cambio
+    # (incluidos los días nuevos que se agregaron entre el último día guardado y el nuevo)
+    if not diario.empty:
+        dia = min(dia, diario.index.max() + pd.Timedelta(days=1))
+    desde = dia - pd.Timedelta(days=2 * VENTANA_TDEE + VENTANA_PROMEDIO)
+    contexto = base[base.index >= desde].copy()
+    peso_previo = base.loc[base.index < desde, "peso_kg"].dropna()
+    if not peso_previo.empty and pd.isna(contexto["peso_kg"].iloc[0]):
+        contexto.iloc[0, contexto.columns.get_loc("peso_kg")] = peso_previo.iloc[-1]  # Semilla para el forward-fill
+    derivado = _derivar(contexto)
+    resultado = diario.reindex(base.index) if not diario.empty else derivado.reindex(base.index)
+    resultado.loc[resultado.index >= dia] = derivado[derivado.index >= dia]
+    resultado[COLUMNAS_BASE] = base
+    return resultado
+
+
+def guardar_diario(diario, archivo=ARCHIVO_DIARIO):
+    os.makedirs(os.path.dirname(archivo), exist_ok=True)
+    diario.to_parquet(archivo)
+
+
+# Funciones para pasar los valores de cada hoja (con encabezado) a DataFrames numéricos
+def _valores_a_df(valores, columnas):
+    filas = [(fila + [""] * len(columnas))[:len(columnas)] for fila in valores[1:]]
+    df = pd.DataFrame(filas, columns=columnas)
+    for columna in columnas[1:]:
+        df[columna] = pd.to_numeric(df[columna])
+    return df
+
+
+def calorias_desde_valores(valores):
+    return _valores_a_df(valores, COLUMNAS_HOJA_CALORIAS)
+
+
+def peso_desde_valores(valores):
+    return _valores_a_df(valores, COLUMNAS_HOJA_PESO)
+
+
+def _huella_fila(fila):
+    return hashlib.sha1("|".join(str(valor) for valor in fila).encode()).hexdigest()
+
+
+def _estado_hoja(valores):
+    return {"filas": len(valores), "ultima": _huella_fila(valores[-1]) if valores else None}
+
+
+def _leer_estado(archivo):
+    if not os.path.exists(archivo):
+        return {}
+    with open(archivo) as f:
+        return json.load(f)
+
+
+# Función para obtener la serie diaria al día con las hojas (que siguen siendo la fuente de verdad, también si se
+# escribe en ellas desde otro dispositivo). Igual que la sincronización del registro de entrenamientos: se lee desde
+# la última fila ya incorporada de cada hoja; si sigue igual solo se agregan las nuevas con actualizar_diario y si
+# cambió (o es la primera vez) se reconstruye todo. Devuelve la serie y el estado de cada hoja
+# ({"calorias"|"peso": {"filas", "ultima"}}), que sirve como versión de lo leído
+def sincronizar_diario(hoja_calorias, hoja_peso, archivo=ARCHIVO_DIARIO, archivo_estado=ARCHIVO_ESTADO_DIARIO):
+    with bloqueo_archivo(archivo_estado + ".lock"):
+        estado = _leer_estado(archivo_estado)
+        hojas = {"calorias": hoja_calorias, "peso": hoja_peso}
+        completo = not os.path.exists(archivo) or set(estado) != set(hojas)
+        nuevas = {}
+        for nombre, hoja in hojas.items():
+            if completo or not estado[nombre]["filas"]:
+                completo = True
+                break
+            valores = hoja.get(f"A{estado[nombre]['filas']}:C")  # Última fila ya incorporada + las nuevas
+            if not valores or _huella_fila(valores[0]) != estado[nombre]["ultima"]:
+                completo = True
+            nuevas[nombre] = valores[1:]
+
+        if completo:
+            valores_calorias = hoja_calorias.get_all_values()
+            valores_peso = hoja_peso.get_all_values()
+            diario = construir_diario(calorias_desde_valores(valores_calorias), peso_desde_valores(valores_peso))
+            estado = {"calorias": _estado_hoja(valores_calorias), "peso": _estado_hoja(valores_peso)}
+        else:
+            diario = pd.read_parquet(archivo)
+            if not any(nuevas.values()):
+                return diario, estado
+            for _, fila in calorias_desde_valores([[]] + nuevas["calorias"]).iterrows():
+                diario = actualizar_diario(diario, fila["Fecha"], calorias=fila["Calorías"])
+            for _, fila in peso_desde_valores([[]] + nuevas["peso"]).iterrows():
+                diario = actualizar_diario(diario, fila["Fecha"], peso_kg=fila["Peso en kg"], grasa=fila["Porcentaje de grasa"])
+            for nombre, filas in nuevas.items():
+                if filas:
+                    estado[nombre] = {"filas": estado[nombre]["filas"] + len(filas), "ultima": _huella_fila(filas[-1])}
+
+        guardar_diario(diario, archivo)
+        with open(archivo_estado, "w") as f:
+            json.dump(estado, f)
+        return diario, estado
+
+
+# Función para agregar las calorías por semana de calendario (lunes a domingo) en una sola pasada: promedio y número
+# de días con más de UMBRAL_CALORIAS_DIA. Termina en la semana del último día con calorías; "semanas" se queda con
+# las últimas N (todas si es None). Las semanas sin días válidos quedan con promedio NaN y 0 días
+def calorias_semanales(diario, semanas=None):
+    calorias = diario["calorias"].dropna() if not diario.empty else pd.Series(dtype=float)
+    if calorias.empty:
+        return pd.DataFrame(columns=["promedio_kcal", "dias"], index=pd.DatetimeIndex([], name="semana"))
+
+    calorias = diario.loc[:calorias.index.max(), "calorias"]
+    validas = calorias.where(calorias > UMBRAL_CALORIAS_DIA)
+    semanal = validas.resample("W-MON", label="left", closed="left").agg(["mean", "count"])
+    semanal = semanal.rename(columns={"mean": "promedio_kcal", "count": "dias"}).rename_axis("semana")
+    return semanal.tail(semanas) if semanas is not None else semanal
+
+
+# Función para medir qué tanto se relaciona la ingesta promedio de la semana con el cambio de peso de esa semana
+def correlacion_calorias_peso(diario):
+    semanal = diario[["calorias_prom_7d", "cambio_semanal_kg"]].dropna()
+    if len(semanal) < 3:
+        return None
+    return semanal["calorias_prom_7d"].corr(semanal["cambio_semanal_kg"])
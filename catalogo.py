@@ -0,0 +1,69 @@
+import json
+import os
+import re
+import tomllib
+from functools import lru_cache
+
+# Catálogo de ejercicios compartido por todas las páginas, en un archivo externo (JSON o TOML):
+#   lugares: lista de lugares
+#   ejercicios: id -> {"nombre", "alias"}
+#   grupos: grupo -> lista de ids (en el orden en que se muestran); un ejercicio puede estar en varios grupos
+# Al cargar se construyen los índices inversos (nombre/alias/id -> id y id -> grupos) para resolver en O(1).
+ARCHIVO_CATALOGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalogo_ejercicios.json")
+
+
+# Función para normalizar un nombre de ejercicio (minúsculas, sin signos ni espacios repetidos)
+def clave_ejercicio(nombre):
+    return re.sub(r"[^a-z0-9]+", " ", str(nombre).lower()).strip()
+
+
+class Catalogo:
+    def __init__(self, datos):
+        self.lugares = list(datos.get("lugares", []))
+        self.ejercicios = {id_ejercicio: {"nombre": e["nombre"], "alias": list(e.get("alias", []))}
+                           for id_ejercicio, e in datos["ejercicios"].items()}
+        self.grupos = {grupo: list(ids) for grupo, ids in datos["grupos"].items()}
+
+        self._por_clave = {}
+        self._grupos_por_id = {id_ejercicio: [] for id_ejercicio in self.ejercicios}
+        for id_ejercicio, ejercicio in self.ejercicios.items():
+            for nombre in [id_ejercicio, ejercicio["nombre"]] + ejercicio["alias"]:
+                self._por_clave.setdefault(clave_ejercicio(nombre), id_ejercicio)
+        for grupo, ids in self.grupos.items():
+            for id_ejercicio in ids:
+                if id_ejercicio not in self.ejercicios:
+                    raise ValueError(f"El grupo '{grupo}' tiene un ejercicio que no está en el catálogo: '{id_ejercicio}'")
+                self._grupos_por_id[id_ejercicio].append(grupo)
+
+    # Id del ejercicio a partir de su id, nombre o alias (sin importar mayúsculas ni signos); None si no existe
+    def resolver(self, nombre):
+        return self._por_clave.get(clave_ejercicio(nombre))
+
+    def nombre(self, id_ejercicio):
+        return self.ejercicios[id_ejercicio]["nombre"]
+
+    # Nombres de los ejercicios de un grupo, en el orden del catálogo
+    def ejercicios_de(self, grupo):
+        return [self.nombre(id_ejercicio) for id_ejercicio in self.grupos.get(grupo, [])]
+
+    # Grupos a los que pertenece un ejercicio (por id, nombre o alias)
+    def grupos_de(self, ejercicio):
+        id_ejercicio = self.resolver(ejercicio)
+        return list(self._grupos_por_id[id_ejercicio]) if id_ejercicio is not None else []
+
+    def pertenece(self, grupo, ejercicio):
+        return grupo in self.grupos_de(ejercicio)
+
+
+@lru_cache(maxsize=4)
+def _leer_catalogo(archivo, modificado):
+    if archivo.endswith(".toml"):
+        with open(archivo, "rb") as f:
+            return Catalogo(tomllib.load(f))
+    with open(archivo, encoding="utf-8") as f:
+        return Catalogo(json.load(f))
+
+
+# Función para obtener el catálogo; se lee una sola vez y solo se vuelve a leer si el archivo cambia
+def cargar_catalogo(archivo=ARCHIVO_CATALOGO):
+    return _leer_catalogo(archivo, os.path.getmtime(archivo))
@@ -0,0 +1,116 @@
+import pandas as pd
+
+# Motor único de comparación entre sesiones: índice ordenado (ejercicio, sesión, set_ordinal) y estrategias de emparejamiento
+
+# Estrategias de emparejamiento -> columnas que, junto con "ejercicio", forman la llave del cruce
+ESTRATEGIAS = {
+    "ordinal": ["set_ordinal"],  # 1er set de hoy vs 1er set de antes (ordenados por el campo "set")
+    "set": ["set"],              # mismo valor en la columna "set"
+    "mejor": [],                 # mejor set (mayor carga normalizada) de hoy vs mejor set de antes
+}
+VALORES_COMPARADOS = ["kilos", "reps", "norm", "fecha"]
+
+
+# Normalización a 8 reps, vectorizada: kilos / reps * 8 (0 si no hay reps)
+def normalizar_a_8_reps(kilos, reps):
+    return (kilos / reps.where(reps > 0) * 8).fillna(0)
+
+
+# Función para construir el índice una sola vez: cada set recibe su sesión (día) y su ordinal dentro de la sesión
+def construir_indice(df):
+    indice = df.reset_index(drop=True).copy()
+    indice["fecha"] = pd.to_datetime(indice["fecha"])
+    indice["sesion"] = indice["fecha"].dt.normalize()
+    indice["orden"] = range(len(indice))
+    for columna in ["set", "kilos", "reps"]:
+        indice[columna] = pd.to_numeric(indice[columna], errors="coerce")
+    indice["norm"] = normalizar_a_8_reps(indice["kilos"], indice["reps"])
+
+    # El ordinal depende del campo "set" (y del orden de captura solo para desempatar), no del orden de las filas
+    indice = indice.sort_values(["ejercicio", "sesion", "set", "orden"], kind="stable", na_position="last")
+    indice["set_ordinal"] = indice.groupby(["ejercicio", "sesion"]).cumcount() + 1
+    return indice.reset_index(drop=True)
+
+
+# Función para filtrar el índice por grupo y/o lugar
+def filtrar_indice(indice, grupo=None, location=None):
+    mascara = pd.Series(True, index=indice.index)
+    if grupo is not None:
+        mascara &= indice["grupo"] == grupo
+    if location is not None:
+        mascara &= indice["location"] == location
+    return indice[mascara]
+
+
+# Función para obtener la sesión inmediatamente anterior a una fecha (dentro del contexto filtrado)
+def sesion_anterior(indice, fecha, grupo=None, location=None):
+    base = filtrar_indice(indice, grupo, location)
+    previas = base.loc[base["sesion"] < pd.Timestamp(fecha).normalize(), "sesion"]
+    return previas.max() if not previas.empty else None
+
+
+# Para cada ejercicio de hoy, la última sesión anterior en la que se hizo (merge_asof sobre las sesiones ordenadas)
+def _sesiones_previas_por_ejercicio(base, hoy, fecha_hoy):
+    sesiones = base[["ejercicio", "sesion"]].drop_duplicates().rename(columns={"sesion": "sesion_antes"})
+    consulta = hoy[["ejercicio"]].drop_duplicates().assign(sesion=fecha_hoy)
+    previas = pd.merge_asof(
+        consulta.sort_values("sesion"),
+        sesiones.sort_values("sesion_antes"),
+        left_on="sesion",
+        right_on="sesion_antes",
+        by="ejercicio",
+        allow_exact_matches=False
+    ).dropna(subset=["sesion_antes"])
+    return base.merge(previas[["ejercicio", "sesion_antes"]], left_on=["ejercicio", "sesion"], right_on=["ejercicio", "sesion_antes"])
+
+
+def _mejor_set(df):
+    if df.empty:
+        return df
+    return df.loc[df.groupby("ejercicio")["norm"].idxmax()]
+
+
+# Función para comparar dos sesiones cualesquiera. Sin fecha_hoy se usa la sesión más reciente; sin fecha_antes,
+# cada ejercicio se compara contra la última vez que se hizo. Mandan los sets de hoy (cruce "left").
+def comparar_sesiones(indice, fecha_hoy=None, fecha_antes=None, estrategia="ordinal", grupo=None, location=None):
+    base = filtrar_indice(indice, grupo, location)
+    fecha_hoy = base["sesion"].max() if fecha_hoy is None else pd.Timestamp(fecha_hoy).normalize()
+    hoy = base[base["sesion"] == fecha_hoy]
+
+    if fecha_antes is None:
+        antes = _sesiones_previas_por_ejercicio(base, hoy, fecha_hoy)
+    else:
+        antes = base[base["sesion"] == pd.Timestamp(fecha_antes).normalize()]
+    antes = antes[antes["ejercicio"].isin(hoy["ejercicio"].unique())]
+
+    if estrategia == "mejor":
+        hoy, antes = _mejor_set(hoy), _mejor_set(antes)
+    llaves = ["ejercicio"] + ESTRATEGIAS[estrategia]
+
+    return pd.merge(
+        hoy[["grupo", "location"] + llaves + VALORES_COMPARADOS],
+        antes[llaves + VALORES_COMPARADOS].drop_duplicates(subset=llaves),
+        on=llaves,
+        how="left",
+        suffixes=("_hoy", "_antes")
+    )
+
+
+# Función para revisar si la sesión más reciente de un ejercicio tiene un récord personal (mejor carga normalizada
+# a 8 reps que cualquier sesión anterior). Devuelve None si el ejercicio no tiene sesiones previas
+def record_personal(indice, ejercicio, location=None):
+    base = filtrar_indice(indice, location=location)
+    base = base[base["ejercicio"] == ejercicio]
+    if base.empty:
+        return None
+    fecha_hoy = base["sesion"].max()
+    previas = base[base["sesion"] < fecha_hoy]
+    if previas.empty:
+        return None
+    mejor_hoy = base.loc[base.loc[base["sesion"] == fecha_hoy, "norm"].idxmax()]
+    mejor_antes = previas.loc[previas["norm"].idxmax()]
+    return {
+        "es_record": bool(mejor_hoy["norm"] > mejor_antes["norm"]),
+        "norm_hoy": mejor_hoy["norm"], "kilos_hoy": mejor_hoy["kilos"], "reps_hoy": mejor_hoy["reps"],
+        "norm_antes": mejor_antes["norm"], "fecha_antes": mejor_antes["sesion"],
+    }
@@ -0,0 +1,33 @@
+import gspread
+from oauth2client.service_account import ServiceAccountCredentials
+
+from hoja_local import ClienteLocal
+from planificador import ClientePlanificado, obtener_planificador
+
+# Permisos para acceder a Google Sheets
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+RUTA_HOJAS_LOCALES = "datos_locales/hojas.sqlite"
+
+
+# Función para crear el cliente de hojas según la configuración (sección opcional [backend_hojas] de los secrets):
+# tipo = "google" (por defecto) usa la API real; tipo = "local" usa el emulador SQLite con latencia/errores simulados.
+# En ambos casos las llamadas pasan por el planificador compartido (sección opcional [planificador] de los secrets)
+def crear_cliente(secrets):
+    planificador = obtener_planificador(secrets.get("planificador", {}))
+    return ClientePlanificado(_cliente_base(secrets), planificador)
+
+
+def _cliente_base(secrets):
+    config = secrets.get("backend_hojas", {})
+    if config.get("tipo", "google") == "local":
+        return ClienteLocal(
+            ruta=config.get("ruta", RUTA_HOJAS_LOCALES),
+            latencia=config.get("latencia", 0.0),
+            prob_error_cuota=config.get("prob_error_cuota", 0.0),
+            lecturas_por_minuto=config.get("lecturas_por_minuto"),
+            escrituras_por_minuto=config.get("escrituras_por_minuto"),
+            semilla=config.get("semilla")
+        )
+
+    credentials = ServiceAccountCredentials.from_json_keyfile_dict(secrets["google_creds"], SCOPE)
+    return gspread.authorize(credentials)
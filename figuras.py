@@ -0,0 +1,100 @@
+import os
+import threading
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+
+import pandas as pd
+from matplotlib.figure import Figure
+
+# Ciclo de vida de las figuras: se crean fuera del registro global de pyplot (que las retiene hasta plt.close),
+# se reutilizan desde un pool acotado por tamaño/dpi y siempre se limpian al terminar de usarse, aunque haya errores.
+# Con la variable de entorno PERFIL_MEMORIA_FIGURAS=1 cada render se mide con tracemalloc (bytes por gráfica).
+# El búfer raster de Agg se reserva en C++ y tracemalloc no lo ve, por eso también se registra el cambio de RSS.
+
+FIGURAS_POR_TAMANO = 2  # Figuras limpias que se guardan para reutilizar por cada (figsize, dpi)
+FONDO_FIGURA = '#0F1116'
+
+_pool = defaultdict(list)
+_candado = threading.Lock()
+_perfil = {"activo": os.environ.get("PERFIL_MEMORIA_FIGURAS") == "1", "mediciones": defaultdict(list)}
+
+
+def _tomar(figsize, dpi):
+    with _candado:
+        libres = _pool[(figsize, dpi)]
+        if libres:
+            return libres.pop()
+    return Figure(figsize=figsize, dpi=dpi)
+
+
+def _devolver(fig, figsize, dpi):
+    fig.clear()
+    with _candado:
+        libres = _pool[(figsize, dpi)]
+        if len(libres) < FIGURAS_POR_TAMANO:
+            libres.append(fig)
+
+
+# Uso: with figura("peso") as (fig, ax): ... st.pyplot(fig). Al salir la figura se limpia y vuelve al pool
+@contextmanager
+def figura(nombre, figsize=(10, 6), dpi=500, nrows=1, ncols=1, **subplot_kw):
+    if _perfil["activo"]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        antes = tracemalloc.get_traced_memory()[0]
+        rss_antes = _rss()
+
+    fig = _tomar(figsize, dpi)
+    try:
+        fig.set_layout_engine("constrained")
+        fig.patch.set_facecolor(FONDO_FIGURA)
+        yield fig, fig.subplots(nrows, ncols, **subplot_kw)
+    finally:
+        _devolver(fig, figsize, dpi)
+        if _perfil["activo"]:
+            actual, pico = tracemalloc.get_traced_memory()
+            rss_despues = _rss()
+            _perfil["mediciones"][nombre].append({
+                "pico": pico - antes,
+                "retenido": actual - antes,
+                "rss": rss_despues - rss_antes if rss_antes is not None else None
+            })
+
+
+# Memoria residente del proceso en bytes (solo Linux; en otros sistemas no se mide)
+def _rss():
+    try:
+        with open("/proc/self/statm") as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def activar_perfil_memoria(activo=True):
+    _perfil["activo"] = activo
+
+
+def perfil_memoria_activo():
+    return _perfil["activo"]
+
+
+# Reporte por gráfica: número de renders, memoria pico promedio/máxima durante el render, memoria que quedó retenida
+# y cambio promedio de RSS (ambas medidas son globales al proceso: si dos sesiones dibujan a la vez se mezclan)
+def reporte_memoria():
+    filas = []
+    for nombre, mediciones in _perfil["mediciones"].items():
+        picos = [medicion["pico"] for medicion in mediciones]
+        retenidos = [medicion["retenido"] for medicion in mediciones]
+        rss = [medicion["rss"] for medicion in mediciones if medicion["rss"] is not None]
+        filas.append({
+            "grafica": nombre,
+            "renders": len(mediciones),
+            "pico_promedio_mb": sum(picos) / len(picos) / 2**20,
+            "pico_maximo_mb": max(picos) / 2**20,
+            "retenido_promedio_kb": sum(retenidos) / len(retenidos) / 2**10,
+            "rss_cambio_promedio_mb": sum(rss) / len(rss) / 2**20 if rss else None,
+        })
+    return pd.DataFrame(filas, columns=["grafica", "renders", "pico_promedio_mb", "pico_maximo_mb", "retenido_promedio_kb",
+                                        "rss_cambio_promedio_mb"])
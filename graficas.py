@@ -0,0 +1,318 @@
+from io import BytesIO
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.collections import LineCollection
+from matplotlib.ticker import MultipleLocator
+
+from figuras import figura
+
+# Gráficas compartidas por las páginas de la app
+
+# Colores por número de set y textos de cada unidad para la gráfica de progreso por sets
+COLORES_SETS = {1: '#58E04F', 2: '#4FD1E0', 3: '#F23F9E', 4: '#F2933F'}
+UNIDADES = {
+    "kg": {"columna": "kilos", "leyenda": "Kg", "valor": "{:.1f} kg", "eje": "Peso (kg)", "titulo": "Progreso de {} (Kg)"},
+    "lb": {"columna": "libras", "leyenda": "Libras", "valor": "{:.1f}", "eje": "Peso (libras)", "titulo": "Progreso de {}"},
+}
+
+# Por encima de este número de puntos las series se reducen con LTTB antes de dibujarse
+UMBRAL_PUNTOS = 300
+
+
+# Convierte fechas (Timestamp, datetime64) a los números que usa matplotlib; deja pasar valores numéricos
+def _a_numeros(valores):
+    valores = np.asarray(list(valores))
+    if valores.dtype.kind in "iuf":
+        return valores.astype(float)
+    return mdates.date2num(valores)
+
+
+# Función para dibujar muchas líneas verticales (de abajo a arriba del eje) como una sola colección
+def lineas_verticales(ax, posiciones, estilo='--', grosor=0.5, color="#60657C"):
+    xs = _a_numeros(posiciones)
+    segmentos = np.stack([np.column_stack([xs, np.zeros_like(xs)]), np.column_stack([xs, np.ones_like(xs)])], axis=1)
+    coleccion = LineCollection(segmentos, linestyles=estilo, linewidths=grosor, colors=color, transform=ax.get_xaxis_transform())
+    ax.add_collection(coleccion, autolim=False)
+    return coleccion
+
+
+# Función para dibujar muchas líneas horizontales (de izquierda a derecha del eje) como una sola colección
+def lineas_horizontales(ax, posiciones, estilo='--', grosor=0.5, color="#60657C"):
+    ys = _a_numeros(posiciones)
+    segmentos = np.stack([np.column_stack([np.zeros_like(ys), ys]), np.column_stack([np.ones_like(ys), ys])], axis=1)
+    coleccion = LineCollection(segmentos, linestyles=estilo, linewidths=grosor, colors=color, transform=ax.get_yaxis_transform())
+    ax.add_collection(coleccion, autolim=False)
+    return coleccion
+
+
+# Función para elegir los índices a conservar con Largest-Triangle-Three-Buckets (mantiene la forma de la serie)
+def indices_lttb(x, y, umbral=UMBRAL_PUNTOS):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if umbral >= n or umbral < 3:
+        return np.arange(n)
+
+    cubeta = (n - 2) / (umbral - 2)
+    seleccionados = [0]
+    a = 0
+    for i in range(umbral - 2):
+        # Promedio de la cubeta siguiente (tercer vértice del triángulo)
+        inicio_sig = int(np.floor((i + 1) * cubeta)) + 1
+        fin_sig = min(int(np.floor((i + 2) * cubeta)) + 1, n)
+        x_prom = x[inicio_sig:fin_sig].mean()
+        y_prom = y[inicio_sig:fin_sig].mean()
+
+        # Punto de la cubeta actual que forma el triángulo de mayor área
+        inicio = int(np.floor(i * cubeta)) + 1
+        fin = int(np.floor((i + 1) * cubeta)) + 1
+        areas = np.abs((x[a] - x_prom) * (y[inicio:fin] - y[a]) - (x[a] - x[inicio:fin]) * (y_prom - y[a]))
+        a = inicio + int(np.nanargmax(areas)) if not np.isnan(areas).all() else inicio
+        seleccionados.append(a)
+
+    seleccionados.append(n - 1)
+    return np.array(seleccionados)
+
+
+# Función para reducir un DataFrame ordenado por fecha a lo más "umbral" filas, guiándose por una columna
+def reducir_serie(df, columna, umbral=UMBRAL_PUNTOS, columna_x="fecha"):
+    if len(df) <= umbral:
+        return df
+    return df.iloc[indices_lttb(_a_numeros(df[columna_x]), df[columna], umbral)]
+
+
+# Función para dibujar el panel de un ejercicio: kilos máximos por día y banda de reps en ese peso
+def dibujar_panel_max_por_dia(ax, ejercicio, df_stats):
+    ax.set_facecolor('#313754')  # Fondo del gráfico
+
+    # Historias largas se reducen a UMBRAL_PUNTOS días (misma selección para kilos y reps)
+    df_stats = reducir_serie(df_stats, "kilos")
+
+    # --- GRAFICAR KILOS (Eje Izquierdo - Azul) ---
+    ax.plot(df_stats["fecha"], df_stats["kilos"], color="#5CD5DD", linewidth=4, label="Kilos Máx", zorder=3)
+    ax.set_ylabel("Kilos", fontsize=12, color="#5CD5DD")
+    ax.tick_params(axis="y", labelcolor="#5CD5DD", labelsize=12)
+
+    # Etiquetar solo el primer y último punto de kilos
+    primer = df_stats.iloc[0]
+    ultimo = df_stats.iloc[-1]
+    ax.text(primer["fecha"], primer["kilos"], f'{primer["kilos"]:.1f} kg', color="#5CD5DD", 
+            fontsize=10, ha='right', va='bottom', fontweight='bold')
+    ax.text(ultimo["fecha"], ultimo["kilos"], f'{ultimo["kilos"]:.1f} kg', color="#5CD5DD", 
+            fontsize=10, ha='left', va='bottom', fontweight='bold')
+
+    # --- GRAFICAR REPS (Eje Secundario - Rosa con Banda) ---
+    ax2 = ax.twinx()
+    
+    # Dibujar la BANDA (relleno entre el mínimo y máximo de reps)
+    ax2.fill_between(
+        df_stats["fecha"], 
+        df_stats["reps_min"], 
+        df_stats["reps_max"], 
+        color="#DB7DE4", 
+        alpha=0.3,          # Transparencia para que se vea como una sombra/banda
+        label="Dispersión Reps"
+    )
+    
+    # Dibujar la línea central (promedio) para que la banda tenga una "guía"
+    ax2.plot(df_stats["fecha"], df_stats["reps_mean"], color="#DB7DE4", linewidth=1.5, label="Reps Media")
+    
+    ax2.set_ylabel("Reps (en peso máx)", fontsize=12, color="#DB7DE4")
+    ax2.tick_params(axis="y", labelcolor="#DB7DE4", labelsize=12)
+
+    # Formatear fechas en el eje X
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%d/%m/%Y"))
+    ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+    ax.tick_params(axis="x", rotation=45, labelsize=8, labelcolor="white")
+
+    # Cuadrícula
+    ax.grid(visible=True, axis='y', which='major', linestyle='--', linewidth=0.5, color="#595D73")
+    lineas_verticales(ax, df_stats["fecha"], estilo=':', grosor=0.4, color="#595D73")
+
+    ax.set_title(f"{ejercicio}", fontsize=18, color="white", pad=20)
+
+
+# Función para renderizar el panel de un ejercicio como PNG (mismas opciones que st.pyplot), para poder cachearlo
+# y mostrarlo por separado
+def renderizar_panel_max_por_dia(ejercicio, df_stats, dpi=200):
+    imagen = BytesIO()
+    with figura("panel_max_por_dia", figsize=(10, 7)) as (fig, ax):
+        dibujar_panel_max_por_dia(ax, ejercicio, df_stats)
+        fig.savefig(imagen, format="png", dpi=dpi, bbox_inches="tight", facecolor=fig.get_facecolor())
+    return imagen.getvalue()
+
+
+# Función para renderizar la gráfica de progreso por sets como PNG (mismas opciones que st.pyplot), para poder
+# generarla fuera del hilo de la página y mostrarla con st.image
+def renderizar_progreso_sets(df_filtrado, ejercicio_seleccionado, unidad="kg", dpi=200):
+    imagen = BytesIO()
+    with figura(f"progreso_{unidad}") as (fig, ax):
+        dibujar_progreso_sets(ax, df_filtrado, ejercicio_seleccionado, unidad)
+        fig.savefig(imagen, format="png", dpi=dpi, bbox_inches="tight", facecolor=fig.get_facecolor())
+    return imagen.getvalue()
+
+
+# Función para quedarse con las últimas N sesiones (días con observaciones) del historial de un ejercicio
+def ultimas_sesiones(df_ejercicio, num_sesiones=5):
+    fechas_unicas = sorted(df_ejercicio["fecha"].unique())[-num_sesiones:]
+    return df_ejercicio[df_ejercicio["fecha"].isin(fechas_unicas)]
+
+
+# Función para graficar el progreso por set de un ejercicio en la unidad pedida ("kg" o "lb") sobre unos ejes dados
+def dibujar_progreso_sets(ax, df_filtrado, ejercicio_seleccionado, unidad="kg"):
+    textos = UNIDADES[unidad]
+    columna = textos["columna"]
+
+    ax.set_facecolor('#313754')  # Fondo del área del gráfico
+    ax2 = ax.twinx()
+    
+    # Obtener sets únicos y graficar
+    sets_unicos = sorted(df_filtrado["set"].unique())
+    handles_peso = []
+    handles_reps = []
+    labels_peso = []
+    labels_reps = []
+    
+    for set_num in sets_unicos:
+        df_set = df_filtrado[df_filtrado["set"] == set_num].sort_values(by="fecha")
+        color = COLORES_SETS.get(set_num, '#FFFFFF')  # Color por defecto si hay más sets
+        
+        line_peso, = ax.plot(df_set["fecha"], df_set[columna], marker='o', color=color, label=f"Set {set_num} - {textos['leyenda']}")
+        line_reps, = ax2.plot(df_set["fecha"], df_set["reps"], linestyle='dashed', marker='x', color=color, label=f"Set {set_num} - Reps")
+        
+        # Agregar texto con el valor en la última observación de cada set
+        ultima_fila = df_set.iloc[-1]
+        ax.text(ultima_fila["fecha"], ultima_fila[columna], textos["valor"].format(ultima_fila[columna]),
+                fontsize=10, color=color, ha='right', va='bottom')
+        
+        handles_peso.append(line_peso)
+        labels_peso.append(f"Set {set_num} - {textos['leyenda']}")
+        handles_reps.append(line_reps)
+        labels_reps.append(f"Set {set_num} - Reps")
+    
+    # Formateo del eje X con fechas únicas
+    fechas_con_datos = sorted(df_filtrado["fecha"].unique())
+    ax.set_xticks(fechas_con_datos)
+    ax.set_xticklabels([fecha.strftime("%d/%m") for fecha in fechas_con_datos], rotation=90, fontsize=12, color='white')
+
+    # Grid vertical solo en fechas con datos
+    lineas_verticales(ax, fechas_con_datos)
+    
+    # Etiquetas y título
+    ax.set_xlabel("Fecha", fontsize=12, color='white')
+    ax.set_ylabel(textos["eje"], fontsize=12, color='white')
+    ax2.set_ylabel("Repeticiones", fontsize=12, color='white')
+    ax.set_title(textos["titulo"].format(ejercicio_seleccionado), fontsize=14, color='white')
+    
+    # Ticks
+    ax.tick_params(axis='y', labelsize=10, labelcolor='white')
+    ax2.tick_params(axis='y', labelsize=10, labelcolor='white')
+    
+    # Ajustar el eje Y secundario (reps) y mostrar solo su grid
+    max_reps = df_filtrado["reps"].max()
+    ax2.set_ylim(0, max(20, max_reps + 2))
+    ax2.yaxis.set_major_locator(MultipleLocator(1))
+
+    # Mostrar grid horizontal cada rep solo en el eje derecho (ax2)
+    lineas_horizontales(ax2, range(0, max(21, max_reps + 2)))
+
+    # Leyendas
+    legend1 = ax2.legend(handles_peso, labels_peso, loc='lower center', bbox_to_anchor=(0.5, -0.3), ncol=len(sets_unicos), fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
+    ax2.legend(handles_reps, labels_reps, loc='lower center', bbox_to_anchor=(0.5, -0.4), ncol=len(sets_unicos), fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
+    ax2.add_artist(legend1)
+
+
+# Función para graficar el promedio semanal de peso y grasa (con el cambio semanal de peso) a partir de las
+# mediciones con columnas "Fecha", "Peso en kg" y "Porcentaje de grasa"
+def dibujar_promedio_semanal_peso(ax1, df):
+    # Agrupamos los datos por semana y calculamos los promedios
+    df = df.set_index('Fecha')
+    df_semanal_peso = df['Peso en kg'].resample('W').mean()
+    df_semanal_grasa = df['Porcentaje de grasa'].resample('W').mean()
+
+    # Calculamos la variación semanal del peso
+    cambio_semanal = df_semanal_peso.diff()
+
+    ax1.set_facecolor('#313754')  # Fondo del área del gráfico
+
+    # Segundo eje Y para el porcentaje de grasa
+    ax2 = ax1.twinx()
+
+    # Graficar la línea del promedio semanal de peso
+    ax1.plot(
+        df_semanal_peso.index, 
+        df_semanal_peso.values, 
+        marker='o', 
+        linestyle='-', 
+        color='#5CD5DD',  # Azul claro para el peso
+        label="Promedio de Peso"
+    )
+
+    # Agregar etiquetas con la variación semanal de peso
+    for i, (x, y) in enumerate(zip(df_semanal_peso.index, df_semanal_peso.values)):
+        if i > 0:  # Omitimos la primera porque no hay comparación
+            cambio = cambio_semanal.iloc[i]
+            ax1.text(x, y, f"{cambio:+.1f} kg", fontsize=10, color="white", ha='center')
+
+    # Graficar la línea del promedio semanal del porcentaje de grasa
+    ax2.plot(
+        df_semanal_grasa.index, 
+        df_semanal_grasa.values, 
+        marker='s', 
+        linestyle='-', 
+        color='#DB7DE4',  # Morado para el porcentaje de grasa
+        label="Promedio de Grasa"
+    )
+
+    # Etiquetas y títulos
+    ax1.set_xlabel('Semana', fontsize=12, color='white')
+    ax1.set_ylabel('Promedio de Peso (kg)', fontsize=12, color='#5CD5DD')
+    ax2.set_ylabel('Promedio de Porcentaje de Grasa (%)', fontsize=12, color='#DB7DE4')
+    ax1.set_title('Promedio Semanal de Peso y Porcentaje de Grasa', fontsize=14, color='white')
+
+    # Personalizar los ticks
+    ax1.tick_params(axis='x', labelsize=10, labelcolor='white', rotation=45)
+    ax1.tick_params(axis='y', labelsize=10, labelcolor='#5CD5DD')
+    ax2.tick_params(axis='y', labelsize=10, labelcolor='#DB7DE4')
+
+    # Agregar cuadrícula
+    ax1.grid(visible=True, which='major', linestyle='--', linewidth=0.5, color="#595D73")
+
+    # Agregar leyenda
+    ax1.legend(loc='upper left', fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
+    ax2.legend(loc='upper right', fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
+
+
+def renderizar_promedio_semanal_peso(df, dpi=200):
+    imagen = BytesIO()
+    with figura("peso_semanal") as (fig, ax1):
+        dibujar_promedio_semanal_peso(ax1, df)
+        fig.savefig(imagen, format="png", dpi=dpi, bbox_inches="tight", facecolor=fig.get_facecolor())
+    return imagen.getvalue()
+
+
+# Función para graficar el promedio de calorías por semana (barras) con los días considerados en cada semana
+def dibujar_calorias_semanales(ax, semanal):
+    ax.set_facecolor('#313754')  # Fondo del área del gráfico
+
+    semanas = semanal.index.strftime("%d/%m")
+    promedios = semanal["promedio_kcal"].fillna(0)
+    ax.bar(semanas, promedios, color='#F2933F', label="Promedio (kcal/día)")
+    for x, (promedio, dias) in enumerate(zip(promedios, semanal["dias"])):
+        ax.text(x, promedio, f"{promedio:.0f}\n({int(dias)} días)", fontsize=9, color="white", ha='center', va='bottom')
+
+    ax.set_xlabel('Semana (lunes)', fontsize=12, color='white')
+    ax.set_ylabel('Calorías promedio por día', fontsize=12, color='white')
+    ax.set_title('Calorías por Semana', fontsize=14, color='white')
+    ax.tick_params(axis='x', labelsize=10, labelcolor='white', rotation=45)
+    ax.tick_params(axis='y', labelsize=10, labelcolor='white')
+    ax.set_ylim(0, max(promedios.max(), 1) * 1.15)  # Espacio para las etiquetas
+    ax.grid(visible=True, which='major', axis='y', linestyle='--', linewidth=0.5, color="#595D73")
+
+
+def renderizar_calorias_semanales(semanal, dpi=200):
+    imagen = BytesIO()
+    with figura("calorias_semanales") as (fig, ax):
+        dibujar_calorias_semanales(ax, semanal)
+        fig.savefig(imagen, format="png", dpi=dpi, bbox_inches="tight", facecolor=fig.get_facecolor())
+    return imagen.getvalue()
@@ -0,0 +1,181 @@
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+
+import requests
+from gspread.exceptions import APIError
+
+# Emulador local de Google Sheets: implementa el subconjunto de gspread que usa la app
+# (get_all_records, get_all_values, col_values, get, append_row, append_rows, delete_rows)
+# guardando las filas en SQLite, con latencia y errores de cuota configurables
+
+
+# Error con la misma forma que los de la API real (gspread.exceptions.APIError con su respuesta HTTP)
+def error_api(codigo, mensaje):
+    respuesta = requests.Response()
+    respuesta.status_code = codigo
+    respuesta._content = json.dumps({"error": {"code": codigo, "message": mensaje}}).encode()
+    return APIError(respuesta)
+
+
+# Convierte el texto de una celda como lo hace get_all_records: entero, flotante o texto
+def _numerizar(valor):
+    for tipo in (int, float):
+        try:
+            return tipo(valor)
+        except ValueError:
+            pass
+    return valor
+
+
+# Convierte un valor escrito a su texto en la hoja (lo que devuelve get_all_values)
+def _a_texto(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+# Convierte letras de columna (A, B, ..., AA) a índice empezando en 1
+def _columna_a_indice(letras):
+    indice = 0
+    for letra in letras.upper():
+        indice = indice * 26 + (ord(letra) - ord("A") + 1)
+    return indice
+
+
+class ClienteLocal:
+    # Sustituto de gspread.Client: open_by_key(id).worksheet(nombre) devuelve una HojaLocal
+    def __init__(self, ruta=":memory:", latencia=0.0, prob_error_cuota=0.0, lecturas_por_minuto=None,
+                 escrituras_por_minuto=None, semilla=None):
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS filas (orden INTEGER PRIMARY KEY AUTOINCREMENT, hoja TEXT NOT NULL, valores TEXT NOT NULL)"
+        )
+        self.conexion.execute("CREATE INDEX IF NOT EXISTS filas_hoja ON filas (hoja, orden)")
+        self.conexion.commit()
+        self.candado = threading.Lock()
+        self.latencia = latencia
+        self.prob_error_cuota = prob_error_cuota
+        self.limites = {"lectura": lecturas_por_minuto, "escritura": escrituras_por_minuto}
+        self.historial = {"lectura": deque(), "escritura": deque()}
+        self.aleatorio = random.Random(semilla)
+        self.llamadas = {"lectura": 0, "escritura": 0, "errores": 0}
+
+    def open_by_key(self, spreadsheet_id):
+        return LibroLocal(self, spreadsheet_id)
+
+    # Simula el costo de una llamada a la API: latencia, errores aleatorios y cuota por minuto
+    def _llamada(self, tipo):
+        if self.latencia:
+            time.sleep(self.latencia * self.aleatorio.uniform(0.5, 1.5))
+
+        with self.candado:
+            self.llamadas[tipo] += 1
+            ahora = time.monotonic()
+            historial = self.historial[tipo]
+            while historial and ahora - historial[0] > 60:
+                historial.popleft()
+            limite = self.limites[tipo]
+            if (limite is not None and len(historial) >= limite) or self.aleatorio.random() < self.prob_error_cuota:
+                self.llamadas["errores"] += 1
+                raise error_api(429, f"Quota exceeded for quota metric '{tipo}' (emulador local)")
+            historial.append(ahora)
+
+
+class LibroLocal:
+    def __init__(self, cliente, spreadsheet_id):
+        self.cliente = cliente
+        self.id = spreadsheet_id
+
+    def worksheet(self, nombre):
+        return HojaLocal(self.cliente, f"{self.id}/{nombre}", nombre)
+
+
+class HojaLocal:
+    def __init__(self, cliente, clave, titulo):
+        self.cliente = cliente
+        self.clave = clave
+        self.title = titulo
+
+    def _filas(self):
+        with self.cliente.candado:
+            cursor = self.cliente.conexion.execute("SELECT valores FROM filas WHERE hoja = ? ORDER BY orden", (self.clave,))
+            return [json.loads(valores) for (valores,) in cursor.fetchall()]
+
+    def get_all_values(self):
+        self.cliente._llamada("lectura")
+        filas = self._filas()
+        ancho = max((len(fila) for fila in filas), default=0)
+        return [fila + [""] * (ancho - len(fila)) for fila in filas]
+
+    def get_all_records(self):
+        self.cliente._llamada("lectura")
+        filas = self._filas()
+        if not filas:
+            return []
+        encabezado = filas[0]
+        return [
+            {columna: _numerizar(fila[i]) if i < len(fila) else "" for i, columna in enumerate(encabezado)}
+            for fila in filas[1:]
+        ]
+
+    def col_values(self, col):
+        self.cliente._llamada("lectura")
+        valores = [fila[col - 1] if col - 1 < len(fila) else "" for fila in self._filas()]
+        while valores and valores[-1] == "":
+            valores.pop()
+        return valores
+
+    # Lectura de un rango en notación A1 (p. ej. "A2:H10" o "A2:H")
+    def get(self, rango):
+        self.cliente._llamada("lectura")
+        coincidencia = re.fullmatch(r"([A-Za-z]+)(\d+)?(?::([A-Za-z]+)(\d+)?)?", rango)
+        if coincidencia is None:
+            raise error_api(400, f"Unable to parse range: {rango}")
+        col_ini, fila_ini, col_fin, fila_fin = coincidencia.groups()
+        col_ini = _columna_a_indice(col_ini)
+        col_fin = _columna_a_indice(col_fin) if col_fin else col_ini
+        fila_ini = int(fila_ini) if fila_ini else 1
+        filas = self._filas()
+        fila_fin = int(fila_fin) if fila_fin else len(filas)
+
+        resultado = []
+        for fila in filas[fila_ini - 1:fila_fin]:
+            recorte = fila[col_ini - 1:col_fin]
+            while recorte and recorte[-1] == "":
+                recorte.pop()
+            resultado.append(recorte)
+        while resultado and not resultado[-1]:
+            resultado.pop()
+        return resultado
+
+    def append_row(self, values, **kwargs):
+        self.append_rows([values], **kwargs)
+
+    def append_rows(self, values, **kwargs):
+        self.cliente._llamada("escritura")
+        with self.cliente.candado:
+            self.cliente.conexion.executemany(
+                "INSERT INTO filas (hoja, valores) VALUES (?, ?)",
+                [(self.clave, json.dumps([_a_texto(valor) for valor in fila])) for fila in values]
+            )
+            self.cliente.conexion.commit()
+
+    # Borra las filas start_index..end_index (numeradas desde 1, inclusivo), como gspread
+    def delete_rows(self, start_index, end_index=None):
+        self.cliente._llamada("escritura")
+        end_index = end_index or start_index
+        with self.cliente.candado:
+            cursor = self.cliente.conexion.execute(
+                "SELECT orden FROM filas WHERE hoja = ? ORDER BY orden LIMIT ? OFFSET ?",
+                (self.clave, end_index - start_index + 1, start_index - 1)
+            )
+            ordenes = [(orden,) for (orden,) in cursor.fetchall()]
+            self.cliente.conexion.executemany("DELETE FROM filas WHERE orden = ?", ordenes)
+            self.cliente.conexion.commit()
@@ -0,0 +1,153 @@
+import argparse
+import pandas as pd
+
+from almacen_local import COLUMNAS_REGISTRO, DIRECTORIO_ALMACEN, guardar_registros, normalizar_registros
+from bitacora import DIRECTORIO_BITACORA, bloqueo_bitacora, conteo_hashes, ids_registros, ids_vigentes, registrar_eventos, sincronizar_con_hoja
+from catalogo import cargar_catalogo
+
+# Importación masiva de historial de otras apps (CSV o JSONL), leída por bloques para no cargar todo en memoria
+FACTOR_LIBRAS = 2.20462
+TAMANO_BLOQUE = 5000
+TAMANO_LOTE_SHEETS = 500
+
+# Nombres de columnas habituales en exportaciones de otras apps -> columnas de "Hoja 1"
+ALIAS_COLUMNAS = {
+    "date": "fecha",
+    "exercise": "ejercicio",
+    "exercise name": "ejercicio",
+    "set order": "set",
+    "set": "set",
+    "weight": "kilos",
+    "weight (kg)": "kilos",
+    "kg": "kilos",
+    "weight (lbs)": "libras",
+    "lbs": "libras",
+    "reps": "reps",
+    "workout name": "grupo",
+    "location": "location",
+}
+
+
+# Función para llevar un bloque de otra app al esquema del registro. "sets_previos" cuenta cuántas filas de cada
+# (fecha, ejercicio) hubo en los bloques anteriores, para que la numeración de sets continúe donde se quedó
+def mapear_bloque(df, catalogo, location, mapa_columnas=None, sets_previos=None):
+    mapa = {columna: ALIAS_COLUMNAS.get(str(columna).strip().lower(), columna) for columna in df.columns}
+    mapa.update(mapa_columnas or {})
+    df = df.rename(columns=mapa)
+    df = df.loc[:, ~df.columns.duplicated()]
+
+    # Mapear ejercicios (por nombre o alias) al catálogo; los que no existen se descartan
+    ids = df["ejercicio"].map(catalogo.resolver)
+    mapeados = ids.notna()
+    df = df[mapeados].copy()
+    ids = ids[mapeados]
+    df["ejercicio"] = ids.map(catalogo.nombre)
+
+    # Respetar el grupo de origen solo si el ejercicio pertenece a él; si no, el primer grupo del catálogo
+    grupo_origen = df["grupo"] if "grupo" in df.columns else pd.Series("", index=df.index)
+    grupo_valido = [catalogo.pertenece(g, e) for g, e in zip(grupo_origen, ids)]
+    df["grupo"] = grupo_origen.where(grupo_valido, ids.map(lambda id_ejercicio: (catalogo.grupos_de(id_ejercicio) or [""])[0]))
+
+    if "location" not in df.columns:
+        df["location"] = location
+    df["location"] = df["location"].fillna(location)
+
+    # Completar kilos/libras con el mismo factor que agregar_datos, de forma vectorizada
+    kilos = _columna_numerica(df, "kilos")
+    libras = _columna_numerica(df, "libras")
+    sin_libras = (kilos > 0) & ~(libras > 0)
+    sin_kilos = (libras > 0) & ~(kilos > 0)
+    df["libras"] = libras.where(~sin_libras, (kilos * FACTOR_LIBRAS).round(1))
+    df["kilos"] = kilos.where(~sin_kilos, (libras / FACTOR_LIBRAS).round(1))
+
+    # Numerar sets por ejercicio y día si la app de origen no los trae
+    df = normalizar_registros(df)
+    if df["set"].isna().any():
+        numero = df.groupby(["fecha", "ejercicio"]).cumcount() + 1
+        if sets_previos is not None and not sets_previos.empty:
+            llaves = pd.MultiIndex.from_frame(df[["fecha", "ejercicio"]])
+            numero += sets_previos.reindex(llaves).fillna(0).astype(int).values
+        df["set"] = df["set"].fillna(numero)
+
+    return df[COLUMNAS_REGISTRO], int((~mapeados).sum())
+
+
+def _columna_numerica(df, columna):
+    if columna not in df.columns:
+        return pd.Series(float("nan"), index=df.index)
+    return pd.to_numeric(df[columna], errors="coerce")
+
+
+# Función para generar los bloques del archivo según su formato
+def leer_en_bloques(archivo, formato, tamano_bloque=TAMANO_BLOQUE):
+    if formato == "jsonl":
+        return pd.read_json(archivo, lines=True, chunksize=tamano_bloque)
+    return pd.read_csv(archivo, chunksize=tamano_bloque)
+
+
+# Función para convertir un bloque a filas de Sheets (mismo formato que agregar_datos)
+def _filas_sheets(df):
+    df = df.copy()
+    df["fecha"] = df["fecha"].dt.strftime("%Y-%m-%d")
+    df["set"] = df["set"].astype("Int64")
+    df["reps"] = df["reps"].astype("Int64")
+    return df.astype(object).where(df.notna(), "").values.tolist()
+
+
+# Función principal de importación: devuelve un resumen con los conteos
+def importar_archivo(archivo, formato="csv", location="Otro", worksheet=None, mapa_columnas=None,
+                     directorio=DIRECTORIO_ALMACEN, tamano_bloque=TAMANO_BLOQUE, tamano_lote=TAMANO_LOTE_SHEETS,
+                     directorio_bitacora=DIRECTORIO_BITACORA):
+    catalogo = cargar_catalogo()
+
+    # Ids de lo que ya existe (la hoja si se pasa, si no la bitácora). Un set del archivo es nuevo si su id no existe,
+    # así dos sets idénticos del mismo día cuentan como dos (secuencias 0 y 1) en lugar de descartarse
+    if worksheet is not None:
+        registros = worksheet.get_all_records()
+        existentes = set(ids_registros(pd.DataFrame(registros, columns=COLUMNAS_REGISTRO)))
+    else:
+        existentes = set(ids_vigentes(directorio_bitacora))
+    leidos = pd.Series(dtype=int)  # Filas por hash ya leídas del archivo, para continuar las secuencias entre bloques
+    # Filas por (fecha, ejercicio) ya leídas, para continuar la numeración de sets entre bloques
+    sets_leidos = pd.Series(dtype=int, index=pd.MultiIndex.from_arrays([[], []], names=["fecha", "ejercicio"]))
+
+    resumen = {"leidos": 0, "importados": 0, "duplicados": 0, "no_mapeados": 0}
+    for bloque in leer_en_bloques(archivo, formato, tamano_bloque):
+        resumen["leidos"] += len(bloque)
+        df, no_mapeados = mapear_bloque(bloque, catalogo, location, mapa_columnas, sets_leidos)
+        resumen["no_mapeados"] += no_mapeados
+        sets_leidos = sets_leidos.add(df.groupby(["fecha", "ejercicio"]).size(), fill_value=0).astype(int)
+
+        ids = ids_registros(df, leidos)
+        leidos = leidos.add(conteo_hashes(ids), fill_value=0).astype(int)
+        nuevos = ~ids.isin(existentes)
+        resumen["duplicados"] += int((~nuevos).sum())
+        df = df[nuevos.values].assign(id=ids[nuevos].values)
+        if df.empty:
+            continue
+
+        # Con hoja, lo importado entra al almacén y a la bitácora al sincronizar (la hoja es la fuente de verdad)
+        if worksheet is not None:
+            filas = _filas_sheets(df[COLUMNAS_REGISTRO])
+            for inicio in range(0, len(filas), tamano_lote):
+                worksheet.append_rows(filas[inicio:inicio + tamano_lote])
+        else:
+            with bloqueo_bitacora(directorio_bitacora):
+                registrar_eventos("alta", df, directorio_bitacora)
+                guardar_registros(df, directorio)
+        resumen["importados"] += len(df)
+
+    if worksheet is not None and resumen["importados"]:
+        sincronizar_con_hoja(worksheet, directorio, directorio_bitacora)
+    return resumen
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importar historial de entrenamientos al almacén local")
+    parser.add_argument("archivo")
+    parser.add_argument("--location", default="Otro")
+    parser.add_argument("--bloque", type=int, default=TAMANO_BLOQUE)
+    args = parser.parse_args()
+
+    formato = "jsonl" if args.archivo.endswith((".jsonl", ".json")) else "csv"
+    print(importar_archivo(args.archivo, formato=formato, location=args.location, tamano_bloque=args.bloque))
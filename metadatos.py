@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+# Metadatos derivados del registro (opciones de los widgets y rangos de fechas), calculados una vez por versión de datos
+
+
+# Función para calcular todos los metadatos a partir de las columnas fecha, grupo, ejercicio y location
+def calcular_metadatos(df, version=None):
+    df = df[["fecha", "grupo", "ejercicio", "location"]].copy()
+    df["fecha"] = pd.to_datetime(df["fecha"]).dt.normalize()
+
+    # Días con datos por (ejercicio, lugar), ordenados para buscar por rango con searchsorted
+    fechas_por_ejercicio = {
+        llave: np.unique(grupo_df["fecha"].values)
+        for llave, grupo_df in df.groupby(["ejercicio", "location"])
+    }
+
+    return {
+        "version": version,
+        "grupos": list(df["grupo"].unique()),
+        "ejercicios_por_grupo": {grupo: list(ejercicios.unique()) for grupo, ejercicios in df.groupby("grupo")["ejercicio"]},
+        "rango_fechas": (df["fecha"].min(), df["fecha"].max()) if not df.empty else (None, None),
+        "fechas_por_ejercicio": fechas_por_ejercicio,
+    }
+
+
+# Función para devolver los metadatos de la sesión, recalculándolos solo si cambió la versión de los datos
+def obtener_metadatos(estado, version, cargar):
+    if estado is not None and estado["version"] == version:
+        return estado
+    return calcular_metadatos(cargar(), version)
+
+
+# Función para saber qué ejercicios tienen al menos un día con datos en el lugar y rango elegidos
+def ejercicios_con_datos(metadatos, ejercicios, location, fecha_inicio, fecha_fin):
+    inicio = np.datetime64(pd.to_datetime(fecha_inicio))
+    fin = np.datetime64(pd.to_datetime(fecha_fin))
+    resultado = []
+    for ejercicio in ejercicios:
+        fechas = metadatos["fechas_por_ejercicio"].get((ejercicio, location))
+        if fechas is None:
+            continue
+        if np.searchsorted(fechas, fin, side="right") > np.searchsorted(fechas, inicio, side="left"):
+            resultado.append(ejercicio)
+    return resultado
@@ -0,0 +1,197 @@
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+from gspread.exceptions import APIError
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+# Planificador central de llamadas a Sheets (compartido por todas las sesiones del proceso):
+# - lecturas idénticas en vuelo se juntan en una sola llamada (single-flight)
+# - cubeta de tokens por spreadsheet y tipo de llamada (lectura/escritura) para no pasar la cuota por minuto
+# - reintentos con espera exponencial aleatoria ante 429 y errores 5xx
+
+LECTURAS_POR_MINUTO = 60  # Cuota por usuario de la API de Sheets
+ESCRITURAS_POR_MINUTO = 60
+INTENTOS = 5
+ESPERA_MAXIMA = 32  # Segundos
+
+METODOS_LECTURA = {"get_all_records", "get_all_values", "col_values", "get"}
+METODOS_ESCRITURA = {"append_row", "append_rows", "delete_rows"}
+
+
+# Un error vale la pena reintentarlo si es de cuota (429) o del servidor (5xx)
+def es_reintentable(error):
+    if not isinstance(error, APIError):
+        return False
+    codigo = error.response.status_code
+    return codigo == 429 or codigo >= 500
+
+
+class CubetaTokens:
+    # Cubeta que se rellena de forma continua a razón de por_minuto tokens; tomar() espera si está vacía
+    def __init__(self, por_minuto, capacidad=None):
+        self.por_segundo = por_minuto / 60
+        self.capacidad = capacidad or por_minuto
+        self.tokens = self.capacidad
+        self.ultimo = time.monotonic()
+        self.candado = threading.Lock()
+        self.esperando = 0
+
+    def tomar(self):
+        with self.candado:
+            self.esperando += 1
+        try:
+            while True:
+                with self.candado:
+                    ahora = time.monotonic()
+                    self.tokens = min(self.capacidad, self.tokens + (ahora - self.ultimo) * self.por_segundo)
+                    self.ultimo = ahora
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    espera = (1 - self.tokens) / self.por_segundo
+                time.sleep(espera)
+        finally:
+            with self.candado:
+                self.esperando -= 1
+
+
+class Planificador:
+    def __init__(self, lecturas_por_minuto=LECTURAS_POR_MINUTO, escrituras_por_minuto=ESCRITURAS_POR_MINUTO,
+                 intentos=INTENTOS, espera_maxima=ESPERA_MAXIMA):
+        self.por_minuto = {"lectura": lecturas_por_minuto, "escritura": escrituras_por_minuto}
+        self.intentos = intentos
+        self.espera_maxima = espera_maxima
+        self.candado = threading.Lock()
+        self.cubetas = {}
+        self.en_vuelo = {}  # llave de la lectura -> Future con el resultado
+        self.generaciones = defaultdict(int)  # Cada escritura invalida las lecturas en vuelo de esa hoja
+        self.contadores = {"llamadas": 0, "coalescidas": 0, "reintentos": 0, "errores": 0}
+
+    def _cubeta(self, spreadsheet_id, tipo):
+        with self.candado:
+            llave = (spreadsheet_id, tipo)
+            if llave not in self.cubetas:
+                self.cubetas[llave] = CubetaTokens(self.por_minuto[tipo])
+            return self.cubetas[llave]
+
+    def _contar(self, contador):
+        with self.candado:
+            self.contadores[contador] += 1
+
+    # Ejecuta una llamada respetando la cubeta del spreadsheet y reintentando los errores de cuota/servidor
+    def _ejecutar(self, spreadsheet_id, tipo, funcion, *args, **kwargs):
+        cubeta = self._cubeta(spreadsheet_id, tipo)
+        reintentos = Retrying(
+            retry=retry_if_exception(es_reintentable),
+            wait=wait_random_exponential(multiplier=0.5, max=self.espera_maxima),
+            stop=stop_after_attempt(self.intentos),
+            before_sleep=lambda _estado: self._contar("reintentos"),
+            reraise=True
+        )
+        try:
+            for intento in reintentos:
+                with intento:
+                    cubeta.tomar()
+                    self._contar("llamadas")
+                    return funcion(*args, **kwargs)
+        except Exception:
+            self._contar("errores")
+            raise
+
+    # Lecturas: si ya hay una idéntica en vuelo (misma hoja, método y argumentos, sin escrituras de por medio)
+    # se espera su resultado en vez de hacer otra llamada. El resultado se comparte: no debe modificarse
+    def leer(self, spreadsheet_id, hoja, metodo, *args):
+        with self.candado:
+            llave = (spreadsheet_id, hoja.title, self.generaciones[(spreadsheet_id, hoja.title)], metodo, args)
+            futuro = self.en_vuelo.get(llave)
+            lider = futuro is None
+            if lider:
+                futuro = self.en_vuelo[llave] = Future()
+            else:
+                self.contadores["coalescidas"] += 1
+
+        if not lider:
+            return futuro.result()
+        try:
+            futuro.set_result(self._ejecutar(spreadsheet_id, "lectura", getattr(hoja, metodo), *args))
+        except Exception as error:
+            futuro.set_exception(error)
+        finally:
+            with self.candado:
+                self.en_vuelo.pop(llave, None)
+        return futuro.result()
+
+    def escribir(self, spreadsheet_id, hoja, metodo, *args, **kwargs):
+        try:
+            return self._ejecutar(spreadsheet_id, "escritura", getattr(hoja, metodo), *args, **kwargs)
+        finally:
+            with self.candado:
+                self.generaciones[(spreadsheet_id, hoja.title)] += 1
+
+    # Métricas para monitorear: llamadas esperando token (profundidad de la cola) por spreadsheet, lecturas en vuelo
+    # y contadores acumulados
+    def metricas(self):
+        with self.candado:
+            cubetas = dict(self.cubetas)
+            metricas = dict(self.contadores, en_vuelo=len(self.en_vuelo))
+        metricas["en_cola"] = {f"{spreadsheet_id}/{tipo}": cubeta.esperando for (spreadsheet_id, tipo), cubeta in cubetas.items()}
+        metricas["en_cola_total"] = sum(metricas["en_cola"].values())
+        return metricas
+
+
+# Envolturas con la misma interfaz que gspread: open_by_key(id).worksheet(nombre) -> hoja cuyas llamadas pasan por el planificador
+class ClientePlanificado:
+    def __init__(self, cliente, planificador):
+        self.cliente = cliente
+        self.planificador = planificador
+
+    def open_by_key(self, spreadsheet_id):
+        libro = self.planificador._ejecutar(spreadsheet_id, "lectura", self.cliente.open_by_key, spreadsheet_id)
+        return LibroPlanificado(libro, spreadsheet_id, self.planificador)
+
+
+class LibroPlanificado:
+    def __init__(self, libro, spreadsheet_id, planificador):
+        self.libro = libro
+        self.id = spreadsheet_id
+        self.planificador = planificador
+
+    def worksheet(self, nombre):
+        hoja = self.planificador._ejecutar(self.id, "lectura", self.libro.worksheet, nombre)
+        return HojaPlanificada(hoja, self.id, self.planificador)
+
+
+class HojaPlanificada:
+    def __init__(self, hoja, spreadsheet_id, planificador):
+        self.hoja = hoja
+        self.id = spreadsheet_id
+        self.planificador = planificador
+        self.title = hoja.title
+
+    def __getattr__(self, nombre):
+        if nombre in METODOS_LECTURA:
+            return lambda *args: self.planificador.leer(self.id, self.hoja, nombre, *args)
+        if nombre in METODOS_ESCRITURA:
+            return lambda *args, **kwargs: self.planificador.escribir(self.id, self.hoja, nombre, *args, **kwargs)
+        return getattr(self.hoja, nombre)
+
+
+_planificador = None
+_candado_planificador = threading.Lock()
+
+
+# Función para obtener el planificador del proceso (se crea una sola vez y lo comparten todas las sesiones)
+def obtener_planificador(config=None):
+    global _planificador
+    with _candado_planificador:
+        if _planificador is None:
+            config = config or {}
+            _planificador = Planificador(
+                lecturas_por_minuto=config.get("lecturas_por_minuto", LECTURAS_POR_MINUTO),
+                escrituras_por_minuto=config.get("escrituras_por_minuto", ESCRITURAS_POR_MINUTO),
+                intentos=config.get("intentos", INTENTOS),
+                espera_maxima=config.get("espera_maxima", ESPERA_MAXIMA)
+            )
+        return _planificador
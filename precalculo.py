@@ -0,0 +1,74 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Precálculo en segundo plano: después de registrar un set se calculan los resúmenes, el récord y la gráfica
+# del ejercicio actual, así los botones muestran el resultado al instante. Cada sesión tiene su Precalculo;
+# un set nuevo reemplaza el trabajo anterior (si no ha empezado se cancela, si ya corre se detiene entre pasos).
+# Cada resultado guarda la versión de los datos con la que se calculó (contexto["version"], la pone el primer paso)
+# y solo se entrega si sigue siendo la versión actual: si otra sesión o dispositivo cambió el registro se recalcula.
+
+HILOS_PRECALCULO = 2
+
+_ejecutor = ThreadPoolExecutor(max_workers=HILOS_PRECALCULO, thread_name_prefix="precalculo")
+
+
+class Precalculo:
+    def __init__(self):
+        self.condicion = threading.Condition()
+        self.generacion = 0
+        self.resultados = {}
+        self.terminado = True
+        self.futuro = None
+
+    # Lanza los pasos en orden; cada paso es (nombre, funcion) y la función recibe un dict de contexto
+    # compartido entre pasos (p. ej. para leer la hoja una sola vez)
+    def lanzar(self, pasos):
+        with self.condicion:
+            self.generacion += 1
+            self.resultados = {}
+            self.terminado = False
+            if self.futuro is not None:
+                self.futuro.cancel()
+            self.futuro = _ejecutor.submit(self._correr, self.generacion, pasos)
+            return self.generacion
+
+    def _correr(self, generacion, pasos):
+        contexto = {}
+        try:
+            for nombre, funcion in pasos:
+                if generacion != self.generacion:
+                    return  # Hay un trabajo más nuevo
+                try:
+                    valor = funcion(contexto)
+                except Exception:
+                    continue  # Si un paso falla, el botón lo calculará en el momento y mostrará el error
+                with self.condicion:
+                    if generacion != self.generacion:
+                        return
+                    self.resultados[nombre] = (contexto.get("version"), valor)
+                    self.condicion.notify_all()
+        finally:
+            with self.condicion:
+                if generacion == self.generacion:
+                    self.terminado = True
+                    self.condicion.notify_all()
+
+    # Devuelve el resultado precalculado si se calculó con la versión dada; si el trabajo sigue corriendo espera hasta
+    # "espera" segundos. None si no hay resultado (nunca se lanzó, el paso falló o los datos ya cambiaron)
+    def obtener(self, nombre, version, espera=5.0):
+        with self.condicion:
+            self.condicion.wait_for(lambda: nombre in self.resultados or self.terminado, timeout=espera)
+            version_resultado, valor = self.resultados.get(nombre, (None, None))
+            return valor if version_resultado == version else None
+
+    # Revisa sin esperar el resultado de un lanzamiento en particular (la generación que devolvió lanzar), sin revisar
+    # versión: sirve para avisos sobre los datos tal como quedaron justo después de ese lanzamiento. Devuelve
+    # (listo, valor); listo es False mientras ese lanzamiento siga corriendo sin ese resultado, y valor es None si
+    # el paso falló o si ya hubo un lanzamiento más nuevo
+    def resultado_de(self, generacion, nombre):
+        with self.condicion:
+            if generacion != self.generacion:
+                return True, None
+            if nombre in self.resultados:
+                return True, self.resultados[nombre][1]
+            return self.terminado, None
@@ -1,47 +1,51 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from oauth2client.service_account import ServiceAccountCredentials
-import gspread
-
-lugares_dict = {
-    "Libres": "Libres",
-    "Otro": "Otro",
-    "Pedregal": "Pedregal",
-    "Patio": "Patio"
-}
+from conexion import crear_cliente
+from agregados import actualizar_max_por_dia, tabla_max_por_dia
+from almacen_local import consultar_registros, listar_particiones, version_almacen
+from bitacora import sincronizar_con_hoja
+from metadatos import ejercicios_con_datos, obtener_metadatos
+from graficas import renderizar_panel_max_por_dia
+from catalogo import cargar_catalogo
+
+# Catálogo de ejercicios, grupos y lugares (compartido con las demás páginas)
+catalogo = cargar_catalogo()
+
+# Número de paneles de ejercicios que se dibujan por página
+PANELES_POR_PAGINA = 4
 
 
-# Configurar credenciales para acceder a Google Sheets usando st.secrets
-scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-credentials = ServiceAccountCredentials.from_json_keyfile_dict(st.secrets["google_creds"], scope)
-gc = gspread.authorize(credentials)
+# Configurar el acceso a Google Sheets (o al emulador local) usando st.secrets
+gc = crear_cliente(st.secrets)
 
 # Abrir la hoja de cálculo
 spreadsheet_id = st.secrets["google_creds"]["spreadsheet_id"]
 worksheet = gc.open_by_key(spreadsheet_id).worksheet("Hoja 1")
 
-# Obtener los datos desde Google Sheets
-registros = worksheet.get_all_records()
-data = pd.DataFrame(registros)
+# Traer solo las filas nuevas de Google Sheets al almacén local particionado por fecha
+sincronizar_con_hoja(worksheet)
 
-# Convertir la columna 'fecha' a tipo datetime
-data["fecha"] = pd.to_datetime(data["fecha"])
+# Metadatos de los widgets (grupos, ejercicios por grupo, fechas), calculados una sola vez por versión del almacén
+st.session_state.metadatos = obtener_metadatos(
+    st.session_state.get("metadatos"),
+    version_almacen(),
+    lambda: consultar_registros(columnas=["fecha", "grupo", "ejercicio", "location"])
+)
+metadatos = st.session_state.metadatos
 
 # Título de la app
 st.title("Gráficas por Grupo de Ejercicios")
 
-# Selección del grupo
-grupos_unicos = data["grupo"].unique()
-location_seleccionado = st.selectbox("Lugar", options=list(lugares_dict.values()))
+# Selección del grupo: primero los del catálogo que tienen datos, luego los que solo existen en la hoja
+grupos_unicos = [g for g in catalogo.grupos if g in metadatos["grupos"]] + [g for g in metadatos["grupos"] if g not in catalogo.grupos]
+location_seleccionado = st.selectbox("Lugar", options=catalogo.lugares)
 grupo_seleccionado = st.selectbox("Selecciona un grupo", grupos_unicos)
 # Selección de fechas personalizadas o preestablecidas
 st.sidebar.header("Filtrar por Fechas")
 
 # Temporadas preestablecidas
 temporadas = {
-    "Todo": (data["fecha"].min(), data["fecha"].max())
+    "Todo": metadatos["rango_fechas"]
 }
 
 # Seleccionar temporada o rango personalizado
@@ -58,107 +62,67 @@ if personalizado:
 fecha_inicio = pd.to_datetime(fecha_inicio)
 fecha_fin = pd.to_datetime(fecha_fin)
 
-# Obtener solo los ejercicios del grupo seleccionado que tienen datos en la ubicación y fechas elegidas
-ejercicios_posibles = data[data["grupo"] == grupo_seleccionado]["ejercicio"].unique()
-
-# Filtrar datos por ubicación y fechas
-data_filtrado = data[
-    (data["fecha"] >= fecha_inicio) & 
-    (data["fecha"] <= fecha_fin) & 
-    (data["location"] == location_seleccionado)
+# Ejercicios del grupo según el catálogo (sin importar con qué grupo se registraron) más los que solo existen
+# en la hoja con ese grupo; de ellos, solo los que tienen datos en la ubicación y fechas elegidas
+ejercicios_posibles = catalogo.ejercicios_de(grupo_seleccionado)
+ejercicios_posibles += [e for e in metadatos["ejercicios_por_grupo"].get(grupo_seleccionado, []) if e not in ejercicios_posibles]
+ejercicios_unicos = ejercicios_con_datos(metadatos, ejercicios_posibles, location_seleccionado, fecha_inicio, fecha_fin)
+
+# Paginación: solo los ejercicios de las páginas abiertas se grafican
+filtros = (location_seleccionado, grupo_seleccionado, fecha_inicio, fecha_fin)
+if st.session_state.get("paginas_consulta") != filtros:
+    st.session_state.paginas_progreso = 1
+    st.session_state.paginas_consulta = filtros
+ejercicios_visibles = ejercicios_unicos[:PANELES_POR_PAGINA * st.session_state.paginas_progreso]
+
+# Agregado de peso máximo por día, guardado en la sesión por mes del almacén: solo se leen los meses del rango de
+# fechas que no estaban agregados o cuyos archivos cambiaron; cada filtro o página solo recorta estas tablas
+particiones = listar_particiones()
+meses_rango = [
+    mes for mes in particiones
+    if (fecha_inicio is None or mes >= fecha_inicio.strftime("%Y-%m")) and (fecha_fin is None or mes <= fecha_fin.strftime("%Y-%m"))
+]
+st.session_state.max_por_dia = actualizar_max_por_dia(
+    st.session_state.get("max_por_dia"),
+    particiones,
+    lambda mes: consultar_registros(
+        fecha_inicio=pd.Period(mes).start_time,
+        fecha_fin=pd.Period(mes).end_time,
+        columnas=["fecha", "ejercicio", "location", "kilos", "reps"]
+    ),
+    meses_rango
+)
+max_por_dia = tabla_max_por_dia(st.session_state.max_por_dia, meses_rango)
+max_por_dia = max_por_dia[
+    (max_por_dia["location"] == location_seleccionado)
+    & (max_por_dia["fecha_dia"] >= fecha_inicio)
+    & (max_por_dia["fecha_dia"] <= fecha_fin)
+    & max_por_dia["ejercicio"].isin(ejercicios_visibles)
 ]
 
-# Cruzar: ejercicios del grupo que existen en los datos filtrados
-ejercicios_unicos = [e for e in ejercicios_posibles if e in data_filtrado["ejercicio"].unique()]
-
-# Determinar el tamaño del mosaico
-num_ejercicios = len(ejercicios_unicos)
-cols = 2
-rows = (num_ejercicios + cols - 1) // cols  # Redondear hacia arriba para filas
-
-# Crear el mosaico de subplots
-fig, axes = plt.subplots(rows, cols, figsize=(20, 7 * rows), dpi=500, constrained_layout=True)
-fig.patch.set_facecolor('#0F1116')
-axes = axes.flatten()  # Aplanar el arreglo de ejes para iterar fácilmente
-
-
-# Iterar sobre cada ejercicio y graficar
-for idx, ejercicio in enumerate(ejercicios_unicos):
-    ax = axes[idx]
-    ax.set_facecolor('#313754')  # Fondo del gráfico
-
-    # 1. Filtrar los datos por ejercicio
-    df_ejercicio = data_filtrado[data_filtrado["ejercicio"] == ejercicio].copy()
-    
-    if df_ejercicio.empty:
-        continue
-
-    # 2. Encontrar el peso máximo por día
-    # Creamos una columna temporal con la fecha (sin hora) para agrupar
-    df_ejercicio['fecha_dia'] = df_ejercicio['fecha'].dt.date
-    max_kilos_por_dia = df_ejercicio.groupby('fecha_dia')['kilos'].transform('max')
-
-    # 3. Filtrar para quedarnos SOLO con los sets que alcanzaron ese peso máximo
-    df_sets_max = df_ejercicio[df_ejercicio['kilos'] == max_kilos_por_dia].copy()
-
-    # 4. Agrupar para obtener estadísticas de esos sets por día
-    # Necesitamos: Kilos (el valor), Reps Min, Reps Max y Reps Promedio
-    df_stats = df_sets_max.groupby('fecha').agg(
-        kilos=('kilos', 'first'),
-        reps_min=('reps', 'min'),
-        reps_max=('reps', 'max'),
-        reps_mean=('reps', 'mean')
-    ).reset_index().sort_values("fecha")
-
-    # --- GRAFICAR KILOS (Eje Izquierdo - Azul) ---
-    ax.plot(df_stats["fecha"], df_stats["kilos"], color="#5CD5DD", linewidth=4, label="Kilos Máx", zorder=3)
-    ax.set_ylabel("Kilos", fontsize=12, color="#5CD5DD")
-    ax.tick_params(axis="y", labelcolor="#5CD5DD", labelsize=12)
-
-    # Etiquetar solo el primer y último punto de kilos
-    primer = df_stats.iloc[0]
-    ultimo = df_stats.iloc[-1]
-    ax.text(primer["fecha"], primer["kilos"], f'{primer["kilos"]:.1f} kg', color="#5CD5DD", 
-            fontsize=10, ha='right', va='bottom', fontweight='bold')
-    ax.text(ultimo["fecha"], ultimo["kilos"], f'{ultimo["kilos"]:.1f} kg', color="#5CD5DD", 
-            fontsize=10, ha='left', va='bottom', fontweight='bold')
-
-    # --- GRAFICAR REPS (Eje Secundario - Rosa con Banda) ---
-    ax2 = ax.twinx()
-    
-    # Dibujar la BANDA (relleno entre el mínimo y máximo de reps)
-    ax2.fill_between(
-        df_stats["fecha"], 
-        df_stats["reps_min"], 
-        df_stats["reps_max"], 
-        color="#DB7DE4", 
-        alpha=0.3,          # Transparencia para que se vea como una sombra/banda
-        label="Dispersión Reps"
-    )
-    
-    # Dibujar la línea central (promedio) para que la banda tenga una "guía"
-    ax2.plot(df_stats["fecha"], df_stats["reps_mean"], color="#DB7DE4", linewidth=1.5, label="Reps Media")
-    
-    ax2.set_ylabel("Reps (en peso máx)", fontsize=12, color="#DB7DE4")
-    ax2.tick_params(axis="y", labelcolor="#DB7DE4", labelsize=12)
-
-    # Formatear fechas en el eje X
-    ax.xaxis.set_major_formatter(mdates.DateFormatter("%d/%m/%Y"))
-    ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-    ax.tick_params(axis="x", rotation=45, labelsize=8, labelcolor="white")
-
-    # Cuadrícula
-    ax.grid(visible=True, axis='y', which='major', linestyle='--', linewidth=0.5, color="#595D73")
-    for fecha in df_stats["fecha"]:
-        ax.axvline(x=fecha, linestyle=':', linewidth=0.4, color="#595D73")
-
-    ax.set_title(f"{ejercicio}", fontsize=18, color="white", pad=20)
-
-# Ocultar subplots vacíos
-for idx in range(len(ejercicios_unicos), len(axes)):
-    fig.delaxes(axes[idx])
-
-st.pyplot(fig)
-
+# Estadísticas por día ya agregadas: solo separamos por ejercicio
+stats_filtradas = max_por_dia.rename(columns={"fecha_dia": "fecha", "kilos_max": "kilos"})
+stats_por_ejercicio = {ejercicio: df for ejercicio, df in stats_filtradas.groupby("ejercicio")}
 
+# Paneles ya renderizados (PNG) de la consulta actual; se descartan al cambiar filtros o datos
+if st.session_state.get("paneles_consulta") != (filtros, metadatos["version"]):
+    st.session_state.paneles = {}
+    st.session_state.paneles_consulta = (filtros, metadatos["version"])
 
+# Mosaico de 2 columnas: cada panel se renderiza (o se toma del caché) y se muestra en cuanto está listo
+cols = 2
+for inicio in range(0, len(ejercicios_visibles), cols):
+    columnas = st.columns(cols)
+    for columna, ejercicio in zip(columnas, ejercicios_visibles[inicio:inicio + cols]):
+        df_stats = stats_por_ejercicio.get(ejercicio)
+        if df_stats is None or df_stats.empty:
+            continue
+        if ejercicio not in st.session_state.paneles:
+            st.session_state.paneles[ejercicio] = renderizar_panel_max_por_dia(ejercicio, df_stats.sort_values("fecha"))
+        columna.image(st.session_state.paneles[ejercicio], use_column_width=True)
+
+# Siguientes páginas: solo se leen, agregan y dibujan cuando el usuario las pide
+if len(ejercicios_visibles) < len(ejercicios_unicos):
+    if st.button(f"Mostrar más ejercicios ({len(ejercicios_visibles)} de {len(ejercicios_unicos)})"):
+        st.session_state.paginas_progreso += 1
+        st.rerun()
@@ -1,126 +1,29 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.ticker import MultipleLocator 
-
-# Configurar credenciales para acceder a Google Sheets usando st.secrets
-scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-credentials = ServiceAccountCredentials.from_json_keyfile_dict(st.secrets["google_creds"], scope)
-gc = gspread.authorize(credentials)
+from conexion import crear_cliente
+from catalogo import cargar_catalogo
+from importador import importar_archivo
+from almacen_local import COLUMNAS_REGISTRO, hash_registros
+from graficas import renderizar_progreso_sets, ultimas_sesiones
+from comparaciones import comparar_sesiones, construir_indice, filtrar_indice, record_personal, sesion_anterior
+from precalculo import Precalculo
+from bitacora import sincronizar_con_hoja, version_bitacora
+from cache_resultados import huella_datos, resultados
+
+# Configurar el acceso a Google Sheets (o al emulador local) usando st.secrets
+gc = crear_cliente(st.secrets)
 spreadsheet_id = st.secrets["google_creds"]["spreadsheet_id"]
 worksheet = gc.open_by_key(spreadsheet_id).worksheet("Hoja 1")
 
 # Crear un DataFrame vacío para almacenar los datos
 data = pd.DataFrame(columns=["fecha", "grupo", "ejercicio", "set", "kilos", "libras", "reps"])
 
-# Listado de lugares
-lugares_dict = {
-    "Libres": "Libres",
-    "Otro": "Otro",
-    "SmartFit": "SmartFit",
-    "Pedregal": "Pedregal",
-    "Patio": "Patio"
-
-}
-
-# Listado de Ejercicios
-
-ejercicios_dict = {
-    "Push": [
-        # Pecho
-        "Bench Press",
-        "Bench Press Machine",
-        "Incline Bench Press",
-        "Incline Bench Machine",
-        "Chest Fly",
-        "Machine Chest Press",
-        "Dips",
-        # Hombros
-        "Shoulder Press",
-        "Lateral Raises",
-        "Front Raises",
-        "Shrugs",
-        # Tríceps
-        "Close-Grip Press",
-        "Tricep Extension",
-        "Overhead Tricep Extension"
-    ],
-    "Upper": [
-        # Espalda,
-        "Pull-Ups",
-        "Pull-Ups BW",
-        "Lat Pulldowns",
-        "Pendlay Row",
-        "Pull Over",
-        # Bíceps
-        "Bayesian Curl",
-        "Preacher Curl",
-        "Preacher Curl (Dumbell)",
-        "Spider Curl",
-        # Pecho
-        "Bench Press",
-        "Bench Press Machine",
-        "Incline Bench Press",
-        "Incline Bench Machine",
-        "Chest Fly",
-        "Machine Chest Press",
-        "Dips",
-        # Hombros
-        "Shoulder Press",
-        "Lateral Raises",
-        "Front Raises",
-        "Shrugs",
-        # Tríceps
-        "Close-Grip Press",
-        "Tricep Extension",
-        "Overhead Tricep Extension"
-    ],
-
-    "Pull": [
-        # Espalda
-        "Chin-Ups",
-        "Pull-Ups",
-        "Pull-Ups BW",
-        "Lat Pulldowns",
-        "Pendlay Row",
-        "Pull Over",
-        # Bíceps
-        "Bayesian Curl",
-        "Preacher Curl",
-        "Preacher Curl (Dumbell)",
-        "Spider Curl"
-    ],
-
-    "Legs": [
-        "Squat",
-        "Hack Squat",
-        "Bulgarian Split Squat",
-        "Leg Press",
-        "Romanian Deadlifts",
-        "Seated Leg Curl",
-        "Leg Extension",
-        "Hip Thrust",
-        "Hip Adduction (C)",
-        "Hip Abduction (A)",
-        "Hip Extension",
-        "Calf Raises",
-        "Deadlift"   # Puede usarse también en Pull
-    ],
-
-    "Abs": [
-        "Crunch Acostado",
-        "Crunch Cables",
-        "Crunch Machine",
-        "L-Pull",
-        "L-Sits",
-        "Oblique Crunch"
-    ]
-}
+# Catálogo de ejercicios, grupos y lugares (compartido con las demás páginas)
+catalogo = cargar_catalogo()
 
+# Estrategia común para emparejar sets entre sesiones en todos los resúmenes ("ordinal", "set" o "mejor")
+ESTRATEGIA_COMPARACION = "ordinal"
 
 # Función para obtener datos de Google Sheets
 def obtener_datos():
@@ -129,169 +32,65 @@ def obtener_datos():
     df["fecha"] = pd.to_datetime(df["fecha"])
     return df
 
-def graficar_progresolb(ejercicio_seleccionado, location_seleccionado):
-    df = obtener_datos()
-    df_filtrado = df[(df["ejercicio"] == ejercicio_seleccionado) & (df["location"] == location_seleccionado)]
-    if df_filtrado.empty:
-        st.warning("No hay datos para este ejercicio.")
+# Función para obtener el historial de un ejercicio en un lugar; se lee una sola vez por versión del registro y se
+# invalida al registrar o eliminar sets, así cambiar de unidad o de número de sesiones no vuelve a leer la hoja
+def obtener_historial_ejercicio(ejercicio_seleccionado, location_seleccionado, version):
+    if st.session_state.get("historiales_version") != version:
+        st.session_state.historiales = {}  # Otra sesión o dispositivo cambió el registro
+        st.session_state.historiales_version = version
+    historiales = st.session_state.setdefault("historiales", {})
+    llave = (ejercicio_seleccionado, location_seleccionado)
+    if llave not in historiales:
+        df = obtener_datos()
+        historiales[llave] = df[(df["ejercicio"] == ejercicio_seleccionado) & (df["location"] == location_seleccionado)]
+    return historiales[llave]
+
+# Función para obtener un resultado precalculado en segundo plano para esta sesión con la versión actual de los datos
+# (None si hay que calcularlo)
+def precalculado(nombre, version, espera=5.0):
+    precalculo = st.session_state.get("precalculo")
+    return precalculo.obtener(nombre, version, espera) if precalculo is not None else None
+
+# Función para avisar del récord del último set registrado en cuanto el precálculo lo tenga (se revisa cada medio
+# segundo sin volver a correr la página); si hubo otro lanzamiento o el paso falló ya no se avisa
+@st.fragment(run_every=0.5)
+def mostrar_record_pendiente():
+    pendiente = st.session_state.get("record_pendiente")
+    precalculo = st.session_state.get("precalculo")
+    if pendiente is None or precalculo is None:
         return
+    generacion, ejercicio, location = pendiente
+    listo, record = precalculo.resultado_de(generacion, ("record", ejercicio, location))
+    if not listo:
+        return  # Todavía se está calculando
+    st.session_state.record_pendiente = None
+    if record is not None and record["es_record"]:
+        st.toast(f"¡Nuevo récord en {ejercicio}! {record['kilos_hoy']} kg x {int(record['reps_hoy'])} reps "
+                 f"({record['norm_hoy']:.1f} kg norm. vs {record['norm_antes']:.1f} el {record['fecha_antes'].date()})",
+                 icon="🏆")
+
+# Función para graficar el progreso de las últimas N sesiones en kilos o libras
+def graficar_progreso(ejercicio_seleccionado, location_seleccionado, unidad, num_sesiones=5):
+    version = version_entrenamientos()
+    imagen = precalculado(("grafica", ejercicio_seleccionado, location_seleccionado, unidad, num_sesiones), version)
+    if imagen is None:
+        df_filtrado = obtener_historial_ejercicio(ejercicio_seleccionado, location_seleccionado, version)
+        if df_filtrado.empty:
+            st.warning("No hay datos para este ejercicio.")
+            return
+        # La gráfica se dibuja en cada rerun mientras haya unidad elegida: se toma del caché si el registro no cambió
+        imagen = resultados.obtener(
+            "grafica_progreso",
+            (ejercicio_seleccionado, location_seleccionado, unidad, num_sesiones),
+            version,
+            lambda: renderizar_progreso_sets(ultimas_sesiones(df_filtrado, num_sesiones), ejercicio_seleccionado, unidad)
+        )
 
-    # Filtrar solo los últimos 5 días con observaciones
-    fechas_unicas = sorted(df_filtrado["fecha"].unique())[-5:]
-    df_filtrado = df_filtrado[df_filtrado["fecha"].isin(fechas_unicas)]
-    
-    # Definir colores para los sets
-    colores_sets = {1: '#58E04F', 2: '#4FD1E0', 3: '#F23F9E', 4: '#F2933F'}
-    
-    # Crear la figura y los ejes
-    fig, ax = plt.subplots(figsize=(10, 6), dpi=500, constrained_layout=True)
-    fig.patch.set_facecolor('#0F1116')  # Fondo de la figura
-    ax.set_facecolor('#313754')  # Fondo del área del gráfico
-    ax2 = ax.twinx()
-    
-    # Obtener sets únicos y graficar
-    sets_unicos = sorted(df_filtrado["set"].unique())
-    handles_libras = []
-    handles_reps = []
-    labels_libras = []
-    labels_reps = []
-    
-    for set_num in sets_unicos:
-        df_set = df_filtrado[df_filtrado["set"] == set_num].sort_values(by="fecha")
-        color = colores_sets.get(set_num, '#FFFFFF')  # Color por defecto si hay más sets
-        
-        line_libras, = ax.plot(df_set["fecha"], df_set["libras"], marker='o', color=color, label=f"Set {set_num} - Libras")
-        line_reps, = ax2.plot(df_set["fecha"], df_set["reps"], linestyle='dashed', marker='x', color=color, label=f"Set {set_num} - Reps")
-        
-        # Agregar texto con el valor en la última observación de cada set
-        ultima_fila = df_set.iloc[-1]
-        ax.text(ultima_fila["fecha"], ultima_fila["libras"], f"{ultima_fila['libras']:.1f}",
-                fontsize=10, color=color, ha='right', va='bottom')
-        
-        handles_libras.append(line_libras)
-        labels_libras.append(f"Set {set_num} - Libras")
-        handles_reps.append(line_reps)
-        labels_reps.append(f"Set {set_num} - Reps")
-    
-    # Formateo del eje X con fechas únicas
-    fechas_con_datos = sorted(df_filtrado["fecha"].unique())
-    ax.set_xticks(fechas_con_datos)
-    ax.set_xticklabels([fecha.strftime("%d/%m") for fecha in fechas_con_datos], rotation=90, fontsize=12, color='white')
-
-    # Grid vertical solo en fechas con datos
-    for fecha in fechas_con_datos:
-        ax.axvline(x=fecha, linestyle='--', linewidth=0.5, color="#60657C")
-    
-    # Etiquetas y título
-    ax.set_xlabel("Fecha", fontsize=12, color='white')
-    ax.set_ylabel("Peso (libras)", fontsize=12, color='white')
-    ax2.set_ylabel("Repeticiones", fontsize=12, color='white')
-    ax.set_title(f"Progreso de {ejercicio_seleccionado}", fontsize=14, color='white')
-    
-    # Ticks
-    ax.tick_params(axis='y', labelsize=10, labelcolor='white')
-    ax2.tick_params(axis='y', labelsize=10, labelcolor='white')
-    
-    # Ajustar el eje Y secundario (reps) y mostrar solo su grid
-    max_reps = df_filtrado["reps"].max()
-    ax2.set_ylim(0, max(20, max_reps + 2))
-    ax2.yaxis.set_major_locator(MultipleLocator(1))
-
-    # Mostrar grid horizontal cada rep solo en el eje derecho (ax2)
-    for y in range(0, max(21, max_reps + 2)):
-        ax2.axhline(y=y, linestyle='--', linewidth=0.5, color="#60657C")
-
-    # Leyendas
-    legend1 = plt.legend(handles_libras, labels_libras, loc='lower center', bbox_to_anchor=(0.5, -0.3), ncol=len(sets_unicos), fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
-    legend2 = plt.legend(handles_reps, labels_reps, loc='lower center', bbox_to_anchor=(0.5, -0.4), ncol=len(sets_unicos), fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
-    plt.gca().add_artist(legend1)
-    
-    # Mostrar gráfico en Streamlit
-    st.pyplot(fig)
-
-def graficar_progresokg(ejercicio_seleccionado, location_seleccionado):
-    df = obtener_datos()
-    df_filtrado = df[(df["ejercicio"] == ejercicio_seleccionado) & (df["location"] == location_seleccionado)]
-    if df_filtrado.empty:
-        st.warning("No hay datos para este ejercicio.")
-        return
-
-    # Filtrar solo los últimos 5 días con observaciones
-    fechas_unicas = sorted(df_filtrado["fecha"].unique())[-5:]
-    df_filtrado = df_filtrado[df_filtrado["fecha"].isin(fechas_unicas)]
-    
-    # Definir colores para los sets
-    colores_sets = {1: '#58E04F', 2: '#4FD1E0', 3: '#F23F9E', 4: '#F2933F'}
-    
-    # Crear la figura y los ejes
-    fig, ax = plt.subplots(figsize=(10, 6), dpi=500, constrained_layout=True)
-    fig.patch.set_facecolor('#0F1116')  # Fondo de la figura
-    ax.set_facecolor('#313754')  # Fondo del área del gráfico
-    ax2 = ax.twinx()
-    
-    # Obtener sets únicos y graficar
-    sets_unicos = sorted(df_filtrado["set"].unique())
-    handles_kilos = []  # Cambiado de libras a kilos
-    handles_reps = []
-    labels_kilos = []   # Cambiado de libras a kilos
-    labels_reps = []
-    
-    for set_num in sets_unicos:
-        df_set = df_filtrado[df_filtrado["set"] == set_num].sort_values(by="fecha")
-        color = colores_sets.get(set_num, '#FFFFFF')
-        
-        # Graficar usando la columna "kilos"
-        line_kilos, = ax.plot(df_set["fecha"], df_set["kilos"], marker='o', color=color, label=f"Set {set_num} - Kg")
-        line_reps, = ax2.plot(df_set["fecha"], df_set["reps"], linestyle='dashed', marker='x', color=color, label=f"Set {set_num} - Reps")
-        
-        # Agregar texto con el valor en la última observación (ahora en kilos)
-        ultima_fila = df_set.iloc[-1]
-        ax.text(ultima_fila["fecha"], ultima_fila["kilos"], f"{ultima_fila['kilos']:.1f} kg",
-                fontsize=10, color=color, ha='right', va='bottom')
-        
-        handles_kilos.append(line_kilos)
-        labels_kilos.append(f"Set {set_num} - Kg")
-        handles_reps.append(line_reps)
-        labels_reps.append(f"Set {set_num} - Reps")
-    
-    # Formateo del eje X
-    fechas_con_datos = sorted(df_filtrado["fecha"].unique())
-    ax.set_xticks(fechas_con_datos)
-    ax.set_xticklabels([fecha.strftime("%d/%m") for fecha in fechas_con_datos], rotation=90, fontsize=12, color='white')
-
-    # Grid vertical
-    for fecha in fechas_con_datos:
-        ax.axvline(x=fecha, linestyle='--', linewidth=0.5, color="#60657C")
-    
-    # Etiquetas y título actualizados a Kilos
-    ax.set_xlabel("Fecha", fontsize=12, color='white')
-    ax.set_ylabel("Peso (kg)", fontsize=12, color='white')
-    ax2.set_ylabel("Repeticiones", fontsize=12, color='white')
-    ax.set_title(f"Progreso de {ejercicio_seleccionado} (Kg)", fontsize=14, color='white')
-    
-    # Ticks
-    ax.tick_params(axis='y', labelsize=10, labelcolor='white')
-    ax2.tick_params(axis='y', labelsize=10, labelcolor='white')
-    
-    # Ajustar el eje Y secundario (reps)
-    max_reps = df_filtrado["reps"].max()
-    ax2.set_ylim(0, max(20, max_reps + 2))
-    ax2.yaxis.set_major_locator(MultipleLocator(1))
-
-    # Grid horizontal
-    for y in range(0, max(21, max_reps + 2)):
-        ax2.axhline(y=y, linestyle='--', linewidth=0.5, color="#60657C")
-
-    # Leyendas actualizadas
-    legend1 = plt.legend(handles_kilos, labels_kilos, loc='lower center', bbox_to_anchor=(0.5, -0.3), ncol=len(sets_unicos), fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
-    legend2 = plt.legend(handles_reps, labels_reps, loc='lower center', bbox_to_anchor=(0.5, -0.4), ncol=len(sets_unicos), fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
-    plt.gca().add_artist(legend1)
-    
-    st.pyplot(fig)
+    st.image(imagen, use_column_width=True)
 
 # Función para actualizar las opciones de ejercicio dependiendo del grupo seleccionado
 def actualizar_ejercicios(grupo):
-    return ejercicios_dict.get(grupo, [])
+    return catalogo.ejercicios_de(grupo)
 
 def generar_resumen_sin_asterisco(dataframe):
     dataframe['fecha'] = pd.to_datetime(dataframe['fecha'])
@@ -354,13 +153,31 @@ def agregar_datos(fecha, grupo, ejercicio, set, kilos, libras, reps, location):
     data = pd.concat([data, pd.DataFrame([nuevo_registro])], ignore_index=True)
     fila = [str(fecha), grupo, ejercicio, set, kilos, libras, reps, location]
     worksheet.append_row(fila)
+    st.session_state.pop("historiales", None)
+    # Recordar el hash del set para que "Eliminar Último" borre este set y no la última fila de otra sesión
+    st.session_state.setdefault("sets_propios", []).append(int(hash_registros(pd.DataFrame([nuevo_registro])).iloc[0]))
 
 def eliminar_ultimo_registro():
     try:
         # Obtener todos los valores para saber cuántas filas hay
-        total_filas = len(worksheet.get_all_values())
+        valores = worksheet.get_all_values()
+        total_filas = len(valores)
         if total_filas > 1:  # Evitar borrar el encabezado (fila 1)
-            worksheet.delete_rows(total_filas)
+            fila = total_filas
+            sets_propios = st.session_state.get("sets_propios", [])
+            if sets_propios:
+                # Última fila de la hoja con el mismo contenido que el último set registrado en esta sesión
+                ancho = len(COLUMNAS_REGISTRO)
+                df = pd.DataFrame([(v + [""] * ancho)[:ancho] for v in valores[1:]], columns=COLUMNAS_REGISTRO)
+                posiciones = (hash_registros(df).values == sets_propios[-1]).nonzero()[0]
+                if len(posiciones) == 0:
+                    sets_propios.pop()
+                    st.error("El último set registrado ya no está en la hoja.")
+                    return False
+                fila = int(posiciones[-1]) + 2  # +1 por el encabezado y +1 porque las filas empiezan en 1
+                sets_propios.pop()
+            worksheet.delete_rows(fila)
+            st.session_state.pop("historiales", None)
             return True
         return False
     except Exception as e:
@@ -368,11 +185,8 @@ def eliminar_ultimo_registro():
         return False
 
 # Función para obtener resumen de los últimos dos días por grupo
-def obtener_resumen_por_grupo(grupo):
-    registros = worksheet.get_all_records()
-    df = pd.DataFrame(registros, columns=["fecha", "grupo", "ejercicio", "set", "kilos", "libras", "reps", "location"])
-
-    df["fecha"] = pd.to_datetime(df["fecha"])
+def obtener_resumen_por_grupo(grupo, df=None):
+    df = obtener_datos() if df is None else df
     df_grupo = df[df["grupo"] == grupo]
 
     if df_grupo.empty:
@@ -382,62 +196,56 @@ def obtener_resumen_por_grupo(grupo):
     df_ultimos_dias = df_grupo[df_grupo["fecha"].isin(ultimos_dias)]
     return generar_resumen_sin_asterisco(df_ultimos_dias)
 
+# Versión del registro de entrenamientos para el caché de resultados: se traen al almacén solo las filas nuevas
+# de la hoja (una lectura corta) y la versión de la bitácora cambia si hubo altas o bajas
+def version_entrenamientos():
+    sincronizar_con_hoja(worksheet)
+    return version_bitacora()
+
+# Función para obtener el índice de comparaciones entre sesiones, reconstruido solo si cambiaron los datos
+def obtener_indice_comparaciones():
+    df = obtener_datos()
+    huella = huella_datos(df)
+    if st.session_state.get("indice_comparaciones_huella") != huella:
+        st.session_state.indice_comparaciones = construir_indice(df)
+        st.session_state.indice_comparaciones_huella = huella
+    return st.session_state.indice_comparaciones
+
 def obtener_estadisticas_recientes():
     try:
-        registros = worksheet.get_all_records()
-        df = pd.DataFrame(registros, columns=["fecha", "grupo", "ejercicio", "set", "kilos", "libras", "reps", "location"])
-        df["fecha"] = pd.to_datetime(df["fecha"])
+        indice = obtener_indice_comparaciones()
         
         # 1. Filtrar por el grupo y ubicación más reciente
-        ultimo_registro = df.iloc[-1]
+        ultimo_registro = indice.loc[indice["orden"].idxmax()]
         grupo_actual = ultimo_registro["grupo"]
         location_actual = ultimo_registro["location"]
         
-        df_contexto = df[(df["grupo"] == grupo_actual) & (df["location"] == location_actual)]
-        
         # 2. Identificar fechas
-        fechas_disponibles = df_contexto["fecha"].drop_duplicates().nlargest(2).tolist()
-        if len(fechas_disponibles) < 2:
+        fecha_mas_reciente = filtrar_indice(indice, grupo_actual, location_actual)["sesion"].max()
+        fecha_anterior = sesion_anterior(indice, fecha_mas_reciente, grupo_actual, location_actual)
+        if fecha_anterior is None:
             return "No hay suficientes entrenamientos previos para este grupo y ubicación para comparar."
-        
-        fecha_mas_reciente = fechas_disponibles[0]
-        fecha_anterior = fechas_disponibles[1]
-        
-        df_reciente = df_contexto[df_contexto["fecha"] == fecha_mas_reciente].copy()
-        df_anterior_completo = df_contexto[df_contexto["fecha"] == fecha_anterior].copy()
-
-        # 3. Normalización (Función auxiliar para limpiar el apply)
-        def normalizar(row):
-            return (row["kilos"] / row["reps"]) * 8 if row["reps"] > 0 else 0
-
-        df_reciente["kilos_norm"] = df_reciente.apply(normalizar, axis=1)
-        df_anterior_completo["kilos_norm"] = df_anterior_completo.apply(normalizar, axis=1)
-
-        # 4. Emparejamiento Dinámico (Cruzar sets actuales vs anteriores)
-        # Usamos un merge 'left' para que manden los ejercicios y sets que hiciste HOY
-        df_comparativo = pd.merge(
-            df_reciente[['ejercicio', 'set', 'kilos', 'reps', 'kilos_norm']], 
-            df_anterior_completo[['ejercicio', 'set', 'kilos', 'reps', 'kilos_norm']], 
-            on=['ejercicio', 'set'], 
-            how='left', 
-            suffixes=('_hoy', '_ant')
+
+        # 3. Emparejamiento de los sets actuales vs los de la sesión anterior (mandan los de HOY)
+        df_comparativo = comparar_sesiones(
+            indice, fecha_mas_reciente, fecha_anterior, ESTRATEGIA_COMPARACION, grupo_actual, location_actual
         )
 
-        # 5. Cálculos de Hoy
+        # 4. Cálculos de Hoy
         total_kilos = df_comparativo["kilos_hoy"].sum()
         total_reps = df_comparativo["reps_hoy"].sum()
         total_sets = len(df_comparativo)
-        total_norm_hoy = df_comparativo["kilos_norm_hoy"].sum()
+        total_norm_hoy = df_comparativo["norm_hoy"].sum()
         norm_por_set_hoy = total_norm_hoy / total_sets if total_sets > 0 else 0
 
-        # 6. Cálculos del Pasado (Solo de los sets que coinciden con hoy)
+        # 5. Cálculos del Pasado (Solo de los sets que coinciden con hoy)
         # Usamos fillna(0) por si hoy hiciste un ejercicio o set que no existía la vez pasada
-        total_kilos_ant = df_comparativo["kilos_ant"].fillna(0).sum()
-        total_reps_ant = df_comparativo["reps_ant"].fillna(0).sum()
-        total_norm_ant = df_comparativo["kilos_norm_ant"].fillna(0).sum()
+        total_kilos_ant = df_comparativo["kilos_antes"].fillna(0).sum()
+        total_reps_ant = df_comparativo["reps_antes"].fillna(0).sum()
+        total_norm_ant = df_comparativo["norm_antes"].fillna(0).sum()
         norm_por_set_ant = total_norm_ant / total_sets if total_sets > 0 else 0
 
-        # 7. Porcentajes de mejora
+        # 6. Porcentajes de mejora
         def calc_pc(actual, anterior):
             return ((actual - anterior) / anterior) * 100 if anterior > 0 else 0
 
@@ -464,52 +272,21 @@ def obtener_estadisticas_recientes():
     except Exception as e:
         return f"Error al procesar: {str(e)}"
     
-def obtener_estadisticas_detalladas():
+def obtener_estadisticas_detalladas(indice=None):
     try:
-        # 1. Cargar datos y preparar DataFrame
-        registros = worksheet.get_all_records()
-        df = pd.DataFrame(registros, columns=["fecha", "grupo", "ejercicio", "set", "kilos", "libras", "reps", "location"])
-        df["fecha"] = pd.to_datetime(df["fecha"])
+        # 1. Índice de sets por (ejercicio, sesión, set_ordinal)
+        indice = obtener_indice_comparaciones() if indice is None else indice
         
         # 2. Identificar el día más reciente (hoy)
-        fecha_mas_reciente = df["fecha"].max()
-        df_hoy = df[df["fecha"] == fecha_mas_reciente].copy()
-        
-        # Crear contador de sets dinámico por ejercicio para hoy
-        df_hoy["set_num"] = df_hoy.groupby("ejercicio").cumcount() + 1
+        fecha_mas_reciente = indice["sesion"].max()
         
-        # 3. Buscar el historial de los ejercicios realizados hoy
-        ejercicios_hoy = df_hoy["ejercicio"].unique()
-        df_pasado_total = df[(df["ejercicio"].isin(ejercicios_hoy)) & (df["fecha"] < fecha_mas_reciente)].copy()
+        # 3. Comparar cada ejercicio de hoy con la última vez que se hizo (set por set)
+        comparativa = comparar_sesiones(indice, fecha_mas_reciente, estrategia=ESTRATEGIA_COMPARACION)
         
-        if df_pasado_total.empty:
+        if comparativa["fecha_antes"].isna().all():
             return f"Entrenamiento del {fecha_mas_reciente.date()} registrado. No hay datos previos para comparar estos ejercicios."
 
-        # Para cada ejercicio, buscamos la fecha de la última vez que se hizo
-        ultimas_fechas_per_ejercicio = df_pasado_total.groupby("ejercicio")["fecha"].max().reset_index()
-        df_antes_raw = pd.merge(df_pasado_total, ultimas_fechas_per_ejercicio, on=["ejercicio", "fecha"])
-        
-        # Crear contador de sets para el pasado
-        df_antes_raw["set_num"] = df_antes_raw.groupby("ejercicio").cumcount() + 1
-
-        # 4. Normalización a 8 reps
-        def calcular_norm(row):
-            return (row["kilos"] / row["reps"]) * 8 if row["reps"] > 0 else 0
-
-        df_hoy["norm"] = df_hoy.apply(calcular_norm, axis=1)
-        df_antes_raw["norm"] = df_antes_raw.apply(calcular_norm, axis=1)
-
-        # 5. MERGE COMPARATIVO (Set por Set)
-        # Usamos how="left" para mandar sobre lo que se hizo HOY
-        comparativa = pd.merge(
-            df_hoy[["grupo", "ejercicio", "set_num", "norm", "kilos", "reps", "fecha"]],
-            df_antes_raw[["ejercicio", "set_num", "norm", "kilos", "reps", "fecha"]],
-            on=["ejercicio", "set_num"],
-            how="left",
-            suffixes=("_hoy", "_antes")
-        )
-
-        # 6. CÁLCULO POR GRUPO MUSCULAR
+        # 4. CÁLCULO POR GRUPO MUSCULAR
         resumen_grupos = ""
         for grupo, data in comparativa.groupby("grupo"):
             # Totales del grupo hoy
@@ -536,7 +313,7 @@ def obtener_estadisticas_detalladas():
                                f"  Carga: {pct_k:+.1f}% | Reps: {pct_n:+.1f}%\n"
                                f"  ------------------------------\n")
 
-        # 7. CÁLCULO TOTAL DEL DÍA (RESUMEN FINAL)
+        # 5. CÁLCULO TOTAL DEL DÍA (RESUMEN FINAL)
         t_k_hoy = comparativa["kilos_hoy"].sum()
         t_k_antes = comparativa["kilos_antes"].sum(skipna=True)
         t_n_hoy = comparativa["reps_hoy"].sum()
@@ -551,8 +328,8 @@ def obtener_estadisticas_detalladas():
                      f"**TOTAL DEL ENTRENAMIENTO:**\n"
                      f"- Mejora Carga Total: {total_pct_k:+.2f}%\n"
                      f"- Mejora Fuerza (Norm): {total_pct_n:+.2f}%\n"
-                     f"- Sets comparados: {int(comparativa['kilos_antes'].count())} de {len(df_hoy)}\n"
-                     f"- Location(s): {', '.join(df_hoy['location'].unique())}")
+                     f"- Sets comparados: {int(comparativa['kilos_antes'].count())} de {len(comparativa)}\n"
+                     f"- Location(s): {', '.join(comparativa['location'].unique())}")
         
         return resultado
 
@@ -562,48 +339,23 @@ def obtener_estadisticas_detalladas():
     
 def obtener_estadisticas_dinamicas():
     try:
-        registros = worksheet.get_all_records()
-        df = pd.DataFrame(registros, columns=["fecha", "grupo", "ejercicio", "set", "kilos", "libras", "reps", "location"])
-        df["fecha"] = pd.to_datetime(df["fecha"])
+        indice = obtener_indice_comparaciones()
         
-        # 1. Identificar el día más reciente y sus datos
-        fecha_mas_reciente = df["fecha"].max()
-        df_hoy = df[df["fecha"] == fecha_mas_reciente].copy()
+        # 1. Identificar el día más reciente y el grupo entrenado
+        fecha_mas_reciente = indice["sesion"].max()
+        grupo_actual = indice.loc[indice["sesion"] == fecha_mas_reciente, "grupo"].iloc[0]
         
-        # Crear un identificador de set secuencial por ejercicio para hoy
-        # (Esto asegura que si hiciste 3 sets, se enumeren 1, 2, 3)
-        df_hoy["set_num"] = df_hoy.groupby("ejercicio").cumcount() + 1
-        
-        # 2. Obtener historial del mismo grupo muscular
-        grupo_actual = df_hoy["grupo"].iloc[0]
-        df_grupo = df[(df["grupo"] == grupo_actual) & (df["fecha"] < fecha_mas_reciente)].copy()
-        
-        if df_grupo.empty:
+        # 2. Identificar la fecha de la sesión anterior del mismo grupo muscular
+        fecha_anterior = sesion_anterior(indice, fecha_mas_reciente, grupo=grupo_actual)
+        if fecha_anterior is None:
             return "No hay entrenamientos previos de este grupo para comparar."
 
-        # Identificar la fecha de la sesión anterior
-        fecha_anterior = df_grupo["fecha"].max()
-        df_antes = df_grupo[df_grupo["fecha"] == fecha_anterior].copy()
-        df_antes["set_num"] = df_antes.groupby("ejercicio").cumcount() + 1
-
-        # 3. Función de normalización
-        def normalizar(row):
-            return (row["kilos"] / row["reps"]) * 8 if row["reps"] > 0 else 0
-
-        df_hoy["norm"] = df_hoy.apply(normalizar, axis=1)
-        df_antes["norm"] = df_antes.apply(normalizar, axis=1)
-
-        # 4. EL MERGE MÁGICO: Solo comparamos lo que hiciste hoy 
-        # Unimos por Ejercicio y Número de Set
-        comparativa = pd.merge(
-            df_hoy[["ejercicio", "set_num", "norm", "kilos", "reps"]],
-            df_antes[["ejercicio", "set_num", "norm", "kilos", "reps"]],
-            on=["ejercicio", "set_num"],
-            how="left", # "left" asegura que solo queden los sets que hiciste HOY
-            suffixes=("_hoy", "_antes")
+        # 3. Solo comparamos lo que hiciste hoy, set por set
+        comparativa = comparar_sesiones(
+            indice, fecha_mas_reciente, fecha_anterior, ESTRATEGIA_COMPARACION, grupo=grupo_actual
         )
 
-        # 5. Cálculos Dinámicos
+        # 4. Cálculos Dinámicos
         # Solo sumamos los kilos/reps de la sesión anterior que tengan un par hoy
         total_kilos_hoy = comparativa["kilos_hoy"].sum()
         total_kilos_antes = comparativa["kilos_antes"].sum(skipna=True)
@@ -625,7 +377,7 @@ def obtener_estadisticas_dinamicas():
         return (f"**Resumen Dinámico ({fecha_mas_reciente.date()})**\n"
                 f"Comparado set por set con sesión del {fecha_anterior.date()}\n"
                 f"--- \n"
-                f"- **Sets realizados hoy:** {len(df_hoy)}\n"
+                f"- **Sets realizados hoy:** {len(comparativa)}\n"
                 f"- **Kilos totales (hoy):** {total_kilos_hoy:.2f}\n"
                 f"- **Kilos Norm. (hoy):** {total_norm_hoy:.2f}\n\n"
                 f"**Progreso Real (Mismos sets):**\n"
@@ -637,14 +389,40 @@ def obtener_estadisticas_dinamicas():
     except Exception as e:
         return f"Error: {str(e)}"
     
+# Función para precalcular en segundo plano lo que se suele pedir después de registrar o eliminar un set:
+# el récord del ejercicio, su gráfica, "Día Terminado" y el resumen del grupo (la hoja se lee una sola vez)
+def lanzar_precalculo(grupo, ejercicio, location):
+    unidad = st.session_state.get("unidad") or "kg"
+    num_sesiones = st.session_state.get("num_sesiones", 5)
+
+    def leer(contexto):
+        contexto["version"] = version_entrenamientos()
+        contexto["df"] = obtener_datos()
+        contexto["indice"] = construir_indice(contexto["df"])
+
+    def graficar(contexto):
+        df = contexto["df"]
+        df_filtrado = df[(df["ejercicio"] == ejercicio) & (df["location"] == location)]
+        if df_filtrado.empty:
+            return None
+        return renderizar_progreso_sets(ultimas_sesiones(df_filtrado, num_sesiones), ejercicio, unidad)
+
+    return st.session_state.setdefault("precalculo", Precalculo()).lanzar([
+        ("datos", leer),
+        (("record", ejercicio, location), lambda contexto: record_personal(contexto["indice"], ejercicio, location)),
+        (("grafica", ejercicio, location, unidad, num_sesiones), graficar),
+        ("estadisticas_detalladas", lambda contexto: obtener_estadisticas_detalladas(contexto["indice"])),
+        (("resumen_grupo", grupo), lambda contexto: obtener_resumen_por_grupo(grupo, contexto["df"])),
+    ])
+
 # Interfaz en Streamlit
 st.title("Registro de Entrenamiento")
 st.markdown("[Consulta el registro completo en Google Sheets](https://docs.google.com/spreadsheets/d/1gCJRvjkOS-kfy9KwXAsv3BYHoQCwv8tWMgBJIRXb4g0/edit?usp=sharing)")
 
 # Selección de fecha y grupo
 fecha = st.date_input("Fecha", datetime.today())
-location = st.selectbox("Lugar", options=list(lugares_dict.values()))
-grupo = st.selectbox("Grupo", options=list(ejercicios_dict.keys()))
+location = st.selectbox("Lugar", options=catalogo.lugares)
+grupo = st.selectbox("Grupo", options=list(catalogo.grupos))
 ejercicio = st.selectbox("Ejercicio", options=actualizar_ejercicios(grupo))
 set_num = st.number_input("Set", min_value=1, step=1)
 kilos = st.number_input("Kilos", min_value=0.0, step=0.5)
@@ -658,15 +436,22 @@ col_reg, col_del = st.columns(2)
 with col_reg:
     if st.button("Registrar", use_container_width=True):
         resumen = agregar_datos(fecha, grupo, ejercicio, set_num, kilos, libras, reps, location)
+        generacion = lanzar_precalculo(grupo, ejercicio, location)
+        st.session_state.record_pendiente = (generacion, ejercicio, location)
         st.success("Datos registrados correctamente.")
 
 with col_del:
     if st.button("Eliminar Último", use_container_width=True, type="primary"):
         if eliminar_ultimo_registro():
+            lanzar_precalculo(grupo, ejercicio, location)
             st.warning("Se ha eliminado la última fila del registro.")
         else:
             st.error("No hay datos para eliminar o la hoja está vacía.")
 
+# El aviso de récord no frena "Registrar": se muestra en cuanto el precálculo lo tenga
+if st.session_state.get("record_pendiente") is not None:
+    mostrar_record_pendiente()
+
 if "unidad" not in st.session_state:
     st.session_state.unidad = None
 
@@ -681,17 +466,32 @@ with col2:
     if st.button("📉 Graficar en Libras", use_container_width=True):
         st.session_state.unidad = "lb"
 
+num_sesiones = st.number_input("Sesiones a graficar", min_value=1, value=5, step=1, key="num_sesiones")
+
 # 3. Lógica de graficado fuera de las columnas (ocupa el ancho total)
-if st.session_state.unidad == "kg":
-    graficar_progresokg(ejercicio, location)
-elif st.session_state.unidad == "lb":
-    graficar_progresolb(ejercicio, location)
+if st.session_state.unidad is not None:
+    graficar_progreso(ejercicio, location, st.session_state.unidad, num_sesiones)
 
 # Botón para obtener resumen de los últimos dos días por grupo
 if st.button("Obtener Resumen de los Últimos Dos Días por Grupo"):
-    resumen_dos_dias = obtener_resumen_por_grupo(grupo)
+    version = version_entrenamientos()
+    resumen_dos_dias = precalculado(("resumen_grupo", grupo), version) or resultados.obtener(
+        "resumen_grupo", (grupo,), version, lambda: obtener_resumen_por_grupo(grupo)
+    )
     st.text_area("Resumen de los últimos dos días", resumen_dos_dias, height=300)
 
 if st.button("Día TerminadoD"):
-    estadisticas = obtener_estadisticas_detalladas()
+    version = version_entrenamientos()
+    estadisticas = precalculado("estadisticas_detalladas", version) or resultados.obtener(
+        "estadisticas_detalladas", (), version, obtener_estadisticas_detalladas
+    )
     st.text_area("Estadísticas del Día", estadisticas, height=300)
+
+# Importación masiva de historial desde otras apps (CSV o JSONL)
+with st.expander("Importar historial"):
+    archivo_importar = st.file_uploader("Archivo CSV o JSONL", type=["csv", "jsonl"])
+    if archivo_importar is not None and st.button("Importar"):
+        formato = "jsonl" if archivo_importar.name.endswith(".jsonl") else "csv"
+        resumen_importacion = importar_archivo(archivo_importar, formato=formato, location=location, worksheet=worksheet)
+        st.success(f"Importados: {resumen_importacion['importados']} de {resumen_importacion['leidos']} "
+                   f"(duplicados: {resumen_importacion['duplicados']}, sin mapear: {resumen_importacion['no_mapeados']})")
@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+from hoja_local import ClienteLocal
+
+# Prueba de carga sin navegador: N sesiones simultáneas de la página "Gimnasio" contra el emulador local de hojas.
+# Cada sesión registra sets, deshace, pide resúmenes y gráficas; al final se revisa que no se hayan perdido filas.
+# AppTest usa un Runtime global, así que cada sesión corre en su propio proceso y todas comparten el archivo SQLite.
+# Las sesiones corren con el directorio de trabajo en un directorio temporal (ahí quedan datos_locales/ y la hoja),
+# así la prueba no toca los datos reales; al terminar se borra.
+
+ARCHIVO_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pruema_app.py")
+
+ENCABEZADO_ENTRENAMIENTOS = ["fecha", "grupo", "ejercicio", "set", "kilos", "libras", "reps", "location"]
+ACCIONES = {"registrar": 0.5, "resumen": 0.2, "grafica": 0.2, "eliminar": 0.1}
+
+
+# Función para crear la base del emulador con los encabezados y algo de historial
+def preparar_hojas(ruta, dias_historial=30):
+    cliente = ClienteLocal(ruta)
+    filas = [ENCABEZADO_ENTRENAMIENTOS]
+    for dia in range(dias_historial):
+        fecha = f"2024-01-{dia % 28 + 1:02d}"
+        filas += [[fecha, "Push", "Bench Press", set_num, 60 + dia, round((60 + dia) * 2.20462, 1), 8, "Libres"] for set_num in (1, 2, 3)]
+    cliente.open_by_key("entrenamientos").worksheet("Hoja 1").append_rows(filas)
+    cliente.open_by_key("calorias").worksheet("Hoja 1").append_rows([["Fecha", "Calorías"]])
+    cliente.open_by_key("peso").worksheet("Hoja 1").append_rows([["Fecha", "Porcentaje de grasa", "Peso en kg"]])
+
+
+def _crear_app(ruta, latencia, prob_error_cuota):
+    app = AppTest.from_file(ARCHIVO_APP, default_timeout=300)
+    app.secrets["google_creds"] = {
+        "spreadsheet_id": "entrenamientos",
+        "spreadsheet_id_calorias": "calorias",
+        "spreadsheet_id_peso": "peso",
+    }
+    app.secrets["backend_hojas"] = {"tipo": "local", "ruta": ruta, "latencia": latencia, "prob_error_cuota": prob_error_cuota}
+    app.run()
+    app.radio[0].set_value("Gimnasio").run()
+    return app
+
+
+def _boton(app, etiqueta):
+    return next(boton for boton in app.button if boton.label == etiqueta)
+
+
+# Una sesión simulada: cada set registrado lleva un número de set único (marcador) para detectar filas perdidas
+def simular_sesion(id_sesion, acciones, directorio, latencia, prob_error_cuota, semilla):
+    os.chdir(directorio)
+    ruta = os.path.join(directorio, "hojas.sqlite")
+    aleatorio = random.Random(semilla)
+    registro = {"latencias": {accion: [] for accion in ACCIONES}, "marcadores": [], "eliminados": 0, "errores": []}
+    app = _crear_app(ruta, latencia, prob_error_cuota)
+
+    tracemalloc.start()
+    registro["inicio"] = time.time()
+
+    for i in range(acciones):
+        accion = aleatorio.choices(list(ACCIONES), weights=list(ACCIONES.values()))[0]
+        if accion == "eliminar" and not registro["marcadores"]:
+            accion = "registrar"
+
+        inicio = time.perf_counter()
+        if accion == "registrar":
+            marcador = (id_sesion + 1) * 100000 + i
+            next(campo for campo in app.number_input if campo.label == "Set").set_value(marcador)
+            next(campo for campo in app.number_input if campo.label == "Kilos").set_value(60.0)
+            _boton(app, "Registrar").click().run()
+            registro["marcadores"].append(marcador)
+        elif accion == "eliminar":
+            _boton(app, "Eliminar Último").click().run()
+            registro["eliminados"] += 1
+        elif accion == "resumen":
+            _boton(app, "Día TerminadoD").click().run()
+        else:
+            _boton(app, "📈 Graficar en Kilos").click().run()
+        registro["latencias"][accion].append(time.perf_counter() - inicio)
+        registro["errores"] += [str(excepcion.value) for excepcion in app.exception]
+
+    registro["fin"] = time.time()
+    registro["memoria_pico"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    registro["rss_max_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return registro
+
+
+# Función para revisar la hoja al final: cada sesión debería conservar (registrados - eliminados) de sus marcadores
+def revisar_consistencia(ruta, resultados):
+    filas = ClienteLocal(ruta).open_by_key("entrenamientos").worksheet("Hoja 1").get_all_records()
+    presentes = {fila["set"] for fila in filas}
+    alertas = []
+    for id_sesion, registro in sorted(resultados.items()):
+        conservados = sum(marcador in presentes for marcador in registro["marcadores"])
+        esperados = len(registro["marcadores"]) - registro["eliminados"]
+        if conservados != esperados:
+            alertas.append(
+                f"Sesión {id_sesion}: {conservados} sets en la hoja, se esperaban {esperados} "
+                f"({len(registro['marcadores'])} registrados, {registro['eliminados']} deshechos)"
+            )
+    return alertas
+
+
+def ejecutar(sesiones, acciones, latencia=0.0, prob_error_cuota=0.0, semilla=0):
+    directorio = tempfile.mkdtemp(prefix="prueba_carga_")
+    try:
+        ruta = os.path.join(directorio, "hojas.sqlite")
+        preparar_hojas(ruta)
+
+        with ProcessPoolExecutor(max_workers=sesiones) as ejecutor:
+            futuros = {
+                i: ejecutor.submit(simular_sesion, i, acciones, directorio, latencia, prob_error_cuota, semilla + i)
+                for i in range(sesiones)
+            }
+            resultados = {i: futuro.result() for i, futuro in futuros.items()}
+        alertas = revisar_consistencia(ruta, resultados)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    # La duración se mide desde que la primera sesión empieza a actuar hasta que termina la última (sin el arranque)
+    duracion = max(r["fin"] for r in resultados.values()) - min(r["inicio"] for r in resultados.values())
+
+    latencias = {accion: [t for r in resultados.values() for t in r["latencias"][accion]] for accion in ACCIONES}
+    total_acciones = sum(len(valores) for valores in latencias.values())
+    return {
+        "sesiones": sesiones,
+        "acciones": total_acciones,
+        "duracion_s": round(duracion, 2),
+        "acciones_por_s": round(total_acciones / duracion, 2) if duracion else None,
+        "latencia_ms": {
+            accion: {f"p{p}": round(float(np.percentile(valores, p)) * 1000, 1) for p in (50, 90, 99)}
+            for accion, valores in latencias.items() if valores
+        },
+        "memoria_pico_python_mb_por_sesion": round(max(r["memoria_pico"] for r in resultados.values()) / 2**20, 1),
+        "rss_max_mb_por_sesion": round(max(r["rss_max_kb"] for r in resultados.values()) / 1024, 1),
+        "errores": [error for r in resultados.values() for error in r["errores"]],
+        "alertas_consistencia": alertas,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga de la página Gimnasio con sesiones simultáneas")
+    parser.add_argument("--sesiones", type=int, default=4)
+    parser.add_argument("--acciones", type=int, default=10)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Latencia simulada por llamada a la hoja (s)")
+    parser.add_argument("--prob-error-cuota", type=float, default=0.0, help="Probabilidad de error 429 por llamada")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(ejecutar(args.sesiones, args.acciones, args.latencia, args.prob_error_cuota, args.semilla),
+                     indent=2, ensure_ascii=False))
@@ -1,41 +1,68 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+from conexion import crear_cliente
+from figuras import figura, perfil_memoria_activo, reporte_memoria
+from graficas import renderizar_calorias_semanales, renderizar_promedio_semanal_peso
+import os
 import pytz
 import runpy  # Importar runpy para ejecutar prueba.py
-
-
-# Configurar credenciales para acceder a Google Sheets usando st.secrets
-scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-credentials = ServiceAccountCredentials.from_json_keyfile_dict(st.secrets["google_creds"], scope)
-gc = gspread.authorize(credentials)
-
-# Función para cargar hoja de Google Sheets usando el ID desde st.secrets
+from calorias_peso import (
+    SEMANAS_CALORIAS, calorias_semanales, correlacion_calorias_peso, sincronizar_diario
+)
+from almacen_local import consultar_registros, version_almacen
+from cache_resultados import resultados
+from bitacora import sincronizar_con_hoja
+from planificador import obtener_planificador
+from tendencias import FRECUENCIAS, METRICAS, NIVELES, calcular_tendencias, pivotear_tendencias
+
+
+# Directorio de la app: las páginas se ejecutan desde aquí aunque el directorio de trabajo (donde quedan los datos
+# locales) sea otro
+DIRECTORIO_APP = os.path.dirname(os.path.abspath(__file__))
+
+# Configurar el acceso a Google Sheets (o al emulador local) usando st.secrets
+gc = crear_cliente(st.secrets)
+
+# Función para cargar hoja de Google Sheets usando el ID desde st.secrets; se abre una sola vez por proceso
+# (open_by_key y worksheet también son llamadas a la API)
+@st.cache_resource
 def cargar_hoja(spreadsheet_id):
     sh = gc.open_by_key(spreadsheet_id)
     worksheet = sh.worksheet("Hoja 1")  # Cambia "Hoja 1" al nombre de la pestaña si es diferente
     return worksheet
 
+# Función para poner al día la serie diaria calorías/peso con ambas hojas (solo se leen las filas nuevas). Devuelve
+# la serie y la versión de cada hoja (filas y huella de la última), que es la llave del caché de resultados; se llama
+# una vez por clic y la versión se pasa a quien la necesite
+def sincronizar_hojas_diario():
+    diario, estado = sincronizar_diario(
+        cargar_hoja(st.secrets["google_creds"]["spreadsheet_id_calorias"]),
+        cargar_hoja(st.secrets["google_creds"]["spreadsheet_id_peso"])
+    )
+    return diario, {nombre: (hoja["filas"], hoja["ultima"]) for nombre, hoja in estado.items()}
+
+def obtener_diario():
+    return sincronizar_hojas_diario()[0]
+
 # Función para registrar los datos en Google Sheets según la opción seleccionada
 def registrar_datos(opcion, porcentaje_grasa=None, peso_kg=None, calorias=None):
     mexico_city_tz = pytz.timezone('America/Mexico_City')
     fecha_actual = datetime.now(mexico_city_tz).strftime("%Y-%m-%d %H:%M:%S")  # Fecha y hora para ambos
 
+    # La serie diaria calorías/peso toma el dato nuevo al sincronizarse (solo lee las filas nuevas de la hoja)
     if opcion == "Peso":
         worksheet = cargar_hoja(st.secrets["google_creds"]["spreadsheet_id_peso"])
         fila = [fecha_actual, porcentaje_grasa, peso_kg]
         worksheet.append_row(fila)
+        obtener_diario()
         return f"Datos registrados: Fecha: {fecha_actual}, Porcentaje de grasa: {porcentaje_grasa}, Peso: {peso_kg} kg"
     
     elif opcion == "Calorías":
         worksheet = cargar_hoja(st.secrets["google_creds"]["spreadsheet_id_calorias"])
-        data = worksheet.get_all_values()
-        df = pd.DataFrame(data[1:], columns=["Fecha", "Calorías"])
-        calorias_total = df[df["Fecha"] == fecha_actual]["Calorías"].astype(float).sum() + calorias
         worksheet.append_row([fecha_actual, calorias])
+        diario = obtener_diario()
+        calorias_total = diario.loc[pd.Timestamp(fecha_actual).normalize(), "calorias"]
         return f"Calorías registradas: {calorias_total} kcal"
 
 # Función para graficar los datos de peso y grasa
@@ -48,190 +75,174 @@ def graficar_datos():
     df['Fecha'] = pd.to_datetime(df['Fecha'])
     
     # Crear la figura y los ejes
-    fig, ax1 = plt.subplots(figsize=(10, 6), dpi=500, constrained_layout=True)
-    fig.patch.set_facecolor('#0F1116')  # Fondo de la figura
-    ax1.set_facecolor('#313754')  # Fondo del área del gráfico
+    with figura("peso_grasa") as (fig, ax1):
+        ax1.set_facecolor('#313754')  # Fondo del área del gráfico
     
-    # Crear un segundo eje Y
-    ax2 = ax1.twinx()
+        # Crear un segundo eje Y
+        ax2 = ax1.twinx()
     
-    # Graficar los datos
-    ax1.plot(
-        df['Fecha'], 
-        df['Peso en kg'], 
-        color='#5CD5DD', 
-        linestyle='-', 
-        label='Peso en kg'
-    )
-    ax2.plot(
-        df['Fecha'], 
-        df['Porcentaje de grasa'], 
-        color='#DB7DE4', 
-        linestyle='-', 
-        label='Porcentaje de grasa'
-    )
+        # Graficar los datos
+        ax1.plot(
+            df['Fecha'], 
+            df['Peso en kg'], 
+            color='#5CD5DD', 
+            linestyle='-', 
+            label='Peso en kg'
+        )
+        ax2.plot(
+            df['Fecha'], 
+            df['Porcentaje de grasa'], 
+            color='#DB7DE4', 
+            linestyle='-', 
+            label='Porcentaje de grasa'
+        )
     
-    # Etiquetas y colores
-    ax1.set_xlabel('Fecha', fontsize=12, color='white')
-    ax1.set_ylabel('Peso en kg', fontsize=12, color='#5CD5DD')
-    ax2.set_ylabel('Porcentaje de grasa', fontsize=12, color='#DB7DE4')
+        # Etiquetas y colores
+        ax1.set_xlabel('Fecha', fontsize=12, color='white')
+        ax1.set_ylabel('Peso en kg', fontsize=12, color='#5CD5DD')
+        ax2.set_ylabel('Porcentaje de grasa', fontsize=12, color='#DB7DE4')
     
-    # Título
-    plt.title('Evolución de Peso y Porcentaje de Grasa', fontsize=14, color='white')
+        # Título
+        ax2.set_title('Evolución de Peso y Porcentaje de Grasa', fontsize=14, color='white')
     
-    # Personalizar los ticks
-    ax1.tick_params(axis='x', rotation=45, labelsize=10, labelcolor='white')
-    ax1.tick_params(axis='y', labelsize=10, labelcolor='#5CD5DD')
-    ax2.tick_params(axis='y', labelsize=10, labelcolor='#DB7DE4')
+        # Personalizar los ticks
+        ax1.tick_params(axis='x', rotation=45, labelsize=10, labelcolor='white')
+        ax1.tick_params(axis='y', labelsize=10, labelcolor='#5CD5DD')
+        ax2.tick_params(axis='y', labelsize=10, labelcolor='#DB7DE4')
     
-    # Agregar cuadrícula
-    ax1.grid(visible=True, which='major', linestyle='--', linewidth=0.5, color='#595D73')
+        # Agregar cuadrícula
+        ax1.grid(visible=True, which='major', linestyle='--', linewidth=0.5, color='#595D73')
     
-    # Agregar leyendas
-    ax1.legend(loc='upper left', fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
-    ax2.legend(loc='upper right', fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
+        # Agregar leyendas
+        ax1.legend(loc='upper left', fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
+        ax2.legend(loc='upper right', fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
     
-    # Mostrar el gráfico en Streamlit
-    st.pyplot(fig)
+        # Mostrar el gráfico en Streamlit
+        st.pyplot(fig)
 
 
-def graficar_promedio_semanal_peso():
+def renderizar_promedio_semanal_peso_hoja():
     worksheet = cargar_hoja(st.secrets["google_creds"]["spreadsheet_id_peso"])
     data = worksheet.get_all_values()
     df = pd.DataFrame(data[1:], columns=["Fecha", "Porcentaje de grasa", "Peso en kg"])
     df['Porcentaje de grasa'] = pd.to_numeric(df['Porcentaje de grasa'])
     df['Peso en kg'] = pd.to_numeric(df['Peso en kg'])
     df['Fecha'] = pd.to_datetime(df['Fecha'])
+    return renderizar_promedio_semanal_peso(df)
 
-    # Agrupamos los datos por semana y calculamos los promedios
-    df.set_index('Fecha', inplace=True)
-    df_semanal_peso = df['Peso en kg'].resample('W').mean()
-    df_semanal_grasa = df['Porcentaje de grasa'].resample('W').mean()
-
-    # Calculamos la variación semanal del peso
-    cambio_semanal = df_semanal_peso.diff()
-
-    # Crear la figura
-    fig, ax1 = plt.subplots(figsize=(10, 6), dpi=500, constrained_layout=True)
-    fig.patch.set_facecolor('#0F1116')  # Fondo de la figura
-    ax1.set_facecolor('#313754')  # Fondo del área del gráfico
-
-    # Segundo eje Y para el porcentaje de grasa
-    ax2 = ax1.twinx()
-
-    # Graficar la línea del promedio semanal de peso
-    ax1.plot(
-        df_semanal_peso.index, 
-        df_semanal_peso.values, 
-        marker='o', 
-        linestyle='-', 
-        color='#5CD5DD',  # Azul claro para el peso
-        label="Promedio de Peso"
-    )
+# La gráfica (PNG) se guarda en el caché de resultados mientras la hoja de peso no cambie
+def graficar_promedio_semanal_peso():
+    _, versiones = sincronizar_hojas_diario()
+    imagen = resultados.obtener("peso_semanal", (), versiones["peso"], renderizar_promedio_semanal_peso_hoja)
+    st.image(imagen, use_column_width=True)
+
+# Calorías del último día con registros, desde la serie diaria ya sincronizada (sin volver a leer la hoja)
+def calcular_calorias_dia_reciente(diario):
+    calorias = diario["calorias"].dropna()
+    if calorias.empty:
+        return "No hay calorías registradas."
+    return f"Calorías consumidas el día más reciente ({calorias.index[-1].date()}): {calorias.iloc[-1]} kcal"
+
+# Calorías por semana de calendario desde la serie diaria ya sincronizada: todas las semanas se agregan una sola vez
+# por versión de la hoja de calorías (en el caché de resultados); cada vista toma las últimas N
+def obtener_calorias_semanales(diario, version, semanas=None):
+    semanal = resultados.obtener("calorias_semanales", (), version, lambda: calorias_semanales(diario))
+    return semanal.tail(semanas) if semanas is not None else semanal
 
-    # Agregar etiquetas con la variación semanal de peso
-    for i, (x, y) in enumerate(zip(df_semanal_peso.index, df_semanal_peso.values)):
-        if i > 0:  # Omitimos la primera porque no hay comparación
-            cambio = cambio_semanal.iloc[i]
-            ax1.text(x, y, f"{cambio:+.1f} kg", fontsize=10, color="white", ha='center')
-
-    # Graficar la línea del promedio semanal del porcentaje de grasa
-    ax2.plot(
-        df_semanal_grasa.index, 
-        df_semanal_grasa.values, 
-        marker='s', 
-        linestyle='-', 
-        color='#DB7DE4',  # Morado para el porcentaje de grasa
-        label="Promedio de Grasa"
-    )
+def calcular_promedio_dos_semanas():
+    diario, versiones = sincronizar_hojas_diario()
+    semanal = obtener_calorias_semanales(diario, versiones["calorias"], 2)
+    if semanal.empty:
+        return "No hay calorías registradas."
+    # Semana del último día con calorías y la anterior (aunque la anterior no tenga registros)
+    semana_1 = semanal.index[-1]
+    semana_2 = semana_1 - pd.Timedelta(days=7)
+    semanal = semanal.reindex([semana_2, semana_1])
 
-    # Etiquetas y títulos
-    ax1.set_xlabel('Semana', fontsize=12, color='white')
-    ax1.set_ylabel('Promedio de Peso (kg)', fontsize=12, color='#5CD5DD')
-    ax2.set_ylabel('Promedio de Porcentaje de Grasa (%)', fontsize=12, color='#DB7DE4')
-    ax1.set_title('Promedio Semanal de Peso y Porcentaje de Grasa', fontsize=14, color='white')
+    # Construir el mensaje de salida
+    mensaje = ""
+    for semana, titulo in [(semana_1, "Última semana"), (semana_2, "Semana anterior")]:
+        promedio, dias = semanal.loc[semana, "promedio_kcal"], semanal.loc[semana, "dias"]
+        if pd.notna(promedio):
+            mensaje += f" **{titulo} ({semana.date()} - {(semana + pd.Timedelta(days=6)).date()}):** {promedio:.2f} kcal/día ({int(dias)} días considerados)"
+        else:
+            mensaje += f"No hay suficientes datos para calcular el promedio de la {titulo.lower()}."
+        # Agregar un salto de línea entre las semanas
+        mensaje += "\n\n" if semana == semana_1 else ""
 
-    # Personalizar los ticks
-    ax1.tick_params(axis='x', labelsize=10, labelcolor='white', rotation=45)
-    ax1.tick_params(axis='y', labelsize=10, labelcolor='#5CD5DD')
-    ax2.tick_params(axis='y', labelsize=10, labelcolor='#DB7DE4')
+    return mensaje
 
-    # Agregar cuadrícula
-    ax1.grid(visible=True, which='major', linestyle='--', linewidth=0.5, color="#595D73")
+# Función para graficar la ingesta promedio y el TDEE estimado contra el peso promedio, desde la serie diaria
+def graficar_calorias_vs_peso():
+    diario = obtener_diario()
+    if diario.empty:
+        st.warning("No hay calorías ni pesos registrados para graficar.")
+        return
 
-    # Agregar leyenda
-    ax1.legend(loc='upper left', fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
-    ax2.legend(loc='upper right', fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
+    # Crear la figura y los ejes
+    with figura("calorias_vs_peso") as (fig, ax1):
+        ax1.set_facecolor('#313754')  # Fondo del área del gráfico
+        ax2 = ax1.twinx()
 
-    # Mostrar el gráfico en Streamlit
-    st.pyplot(fig)
-    
-def calcular_calorias_dia_reciente():
-    worksheet = cargar_hoja(st.secrets["google_creds"]["spreadsheet_id_calorias"])
-    data = worksheet.get_all_values()
-    df = pd.DataFrame(data[1:], columns=["Fecha", "Calorías"])
-    df['Fecha'] = pd.to_datetime(df['Fecha'])  # Convertir a formato datetime
-    df['Calorías'] = pd.to_numeric(df['Calorías'])
+        # Calorías (promedio 7 días y TDEE estimado) en el eje izquierdo, peso promedio en el derecho
+        ax1.plot(diario.index, diario['calorias_prom_7d'], color='#F2933F', linestyle='-', label='Calorías (prom. 7 días)')
+        ax1.plot(diario.index, diario['tdee_estimado'], color='#58E04F', linestyle='--', label='TDEE estimado')
+        ax2.plot(diario.index, diario['peso_prom_7d'], color='#5CD5DD', linestyle='-', label='Peso (prom. 7 días)')
 
-    fecha_reciente = df['Fecha'].dt.date.max()
-    calorias_total = df[df['Fecha'].dt.date == fecha_reciente]["Calorías"].sum()
+        # Etiquetas y títulos
+        ax1.set_xlabel('Fecha', fontsize=12, color='white')
+        ax1.set_ylabel('kcal/día', fontsize=12, color='#F2933F')
+        ax2.set_ylabel('Peso en kg', fontsize=12, color='#5CD5DD')
+        ax1.set_title('Calorías vs Peso', fontsize=14, color='white')
 
-    return f"Calorías consumidas el día más reciente ({fecha_reciente}): {calorias_total} kcal"
+        # Personalizar los ticks
+        ax1.tick_params(axis='x', rotation=45, labelsize=10, labelcolor='white')
+        ax1.tick_params(axis='y', labelsize=10, labelcolor='#F2933F')
+        ax2.tick_params(axis='y', labelsize=10, labelcolor='#5CD5DD')
 
-def calcular_promedio_dos_semanas():
-    worksheet = cargar_hoja(st.secrets["google_creds"]["spreadsheet_id_calorias"])
-    data = worksheet.get_all_values()
-    df = pd.DataFrame(data[1:], columns=["Fecha", "Calorías"])
-    df['Fecha'] = pd.to_datetime(df['Fecha'])  # Convertir a formato datetime
-    df['Calorías'] = pd.to_numeric(df['Calorías'])
-
-    # Sumar calorías por día
-    df_diario = df.groupby(df['Fecha'].dt.date)['Calorías'].sum().reset_index()
-    df_diario['Fecha'] = pd.to_datetime(df_diario['Fecha'])  # Asegurar que la columna es datetime
-    df_diario.set_index('Fecha', inplace=True)  # Convertir a índice de fecha
-
-    # Obtener el lunes más reciente como fecha máxima
-    fecha_max = df_diario.index.max()
-    fecha_max_lunes = fecha_max - pd.Timedelta(days=fecha_max.weekday())  # Último lunes
-    fecha_inicio_semana_1 = fecha_max_lunes  # Inicio de la semana más reciente
-    fecha_inicio_semana_2 = fecha_inicio_semana_1 - pd.Timedelta(days=7)  # Inicio de la semana anterior
-    fecha_fin_semana_1 = fecha_inicio_semana_1 + pd.Timedelta(days=6)  # Domingo de la semana más reciente
-    fecha_fin_semana_2 = fecha_inicio_semana_2 + pd.Timedelta(days=6)  # Domingo de la semana anterior
-
-    # Filtrar solo los días con más de 1500 calorías
-    df_filtrado = df_diario[df_diario["Calorías"] > 1500]
-    
-    # Filtrar las dos semanas
-    df_semana_1 = df_filtrado.loc[(df_filtrado.index >= fecha_inicio_semana_1) & (df_filtrado.index <= fecha_fin_semana_1)]
-    df_semana_2 = df_filtrado.loc[(df_filtrado.index >= fecha_inicio_semana_2) & (df_filtrado.index <= fecha_fin_semana_2)]
+        # Agregar cuadrícula y leyendas
+        ax1.grid(visible=True, which='major', linestyle='--', linewidth=0.5, color='#595D73')
+        ax1.legend(loc='upper left', fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
+        ax2.legend(loc='upper right', fontsize=10, facecolor='#313754', edgecolor='white', labelcolor='white')
 
-    # Calcular los promedios de cada semana considerando solo los días con más de 1500 calorías
-    promedio_semana_1 = df_semana_1["Calorías"].mean() if not df_semana_1.empty else None
-    promedio_semana_2 = df_semana_2["Calorías"].mean() if not df_semana_2.empty else None
-    dias_semana_1 = df_semana_1.shape[0]
-    dias_semana_2 = df_semana_2.shape[0]
+        # Mostrar el gráfico en Streamlit
+        st.pyplot(fig)
 
-    # Construir el mensaje de salida
-    mensaje = ""
-    if promedio_semana_1 is not None:
-        mensaje += f" **Última semana ({fecha_inicio_semana_1.date()} - {fecha_fin_semana_1.date()}):** {promedio_semana_1:.2f} kcal/día ({dias_semana_1} días considerados)\n"
-    else:
-        mensaje += "No hay suficientes datos para calcular el promedio de la última semana.\n\n"
+    correlacion = correlacion_calorias_peso(diario)
+    if correlacion is not None:
+        st.info(f"Correlación entre calorías promedio y cambio semanal de peso: {correlacion:+.2f}")
 
-    # Agregar un salto de línea entre las semanas
-    mensaje += "\n"
 
-    if promedio_semana_2 is not None:
-        mensaje += f" **Semana anterior ({fecha_inicio_semana_2.date()} - {fecha_fin_semana_2.date()}):** {promedio_semana_2:.2f} kcal/día ({dias_semana_2} días considerados)"
-    else:
-        mensaje += "No hay suficientes datos para calcular el promedio de la semana anterior."
+# Función para graficar la tabla de tendencias (una línea por grupo o ejercicio)
+def graficar_tendencias(pivote, metrica, periodo):
+    colores = ['#5CD5DD', '#DB7DE4', '#58E04F', '#F23F9E', '#F2933F', '#4FD1E0']
 
-    return mensaje
+    with figura("tendencias") as (fig, ax):
+        ax.set_facecolor('#313754')  # Fondo del área del gráfico
+
+        for i, columna in enumerate(pivote.columns):
+            ax.plot(pivote.index, pivote[columna], marker='o', linestyle='-', color=colores[i % len(colores)], label=columna)
+
+        # Etiquetas y títulos
+        ax.set_xlabel(periodo, fontsize=12, color='white')
+        ax.set_ylabel(metrica, fontsize=12, color='white')
+        ax.set_title(f'{metrica} - Tendencia {periodo}', fontsize=14, color='white')
+
+        # Personalizar los ticks
+        ax.tick_params(axis='x', labelsize=10, labelcolor='white', rotation=45)
+        ax.tick_params(axis='y', labelsize=10, labelcolor='white')
+
+        # Agregar cuadrícula y leyenda
+        ax.grid(visible=True, which='major', linestyle='--', linewidth=0.5, color="#595D73")
+        ax.legend(loc='upper left', fontsize=8, facecolor='#313754', edgecolor='white', labelcolor='white')
+
+        # Mostrar el gráfico en Streamlit
+        st.pyplot(fig)
 
 
 # Streamlit app
 st.title("Registro de Peso, Calorías y Entrenamiento de Gimnasio")
-opcion = st.radio("Selecciona una opción", ("Peso", "Calorías", "Gimnasio", "Progreso"))
+opcion = st.radio("Selecciona una opción", ("Peso", "Calorías", "Gimnasio", "Progreso", "Tendencias"))
 
 if opcion == "Peso":
     grasa = st.number_input("Porcentaje de grasa", min_value=0.0, max_value=100.0, step=0.1)
@@ -255,15 +266,82 @@ elif opcion == "Calorías":
         st.success(resultado)
 
     if st.button("Calcular Calorías del Día Más Reciente"):
-        resultado_calorias = calcular_calorias_dia_reciente()
+        diario, versiones = sincronizar_hojas_diario()
+        resultado_calorias = resultados.obtener(
+            "calorias_dia_reciente", (), versiones["calorias"], lambda: calcular_calorias_dia_reciente(diario)
+        )
         st.info(resultado_calorias)
 
     if st.button("Calcular Promedio de Calorías en las Últimas 2 Semanas"):
         resultado_promedio = calcular_promedio_dos_semanas()
         st.info(resultado_promedio)
 
+    semanas = st.number_input("Semanas a mostrar", min_value=1, value=SEMANAS_CALORIAS, step=1)
+    if st.button("Ver Calorías por Semana"):
+        diario, versiones = sincronizar_hojas_diario()
+        semanal = obtener_calorias_semanales(diario, versiones["calorias"], int(semanas))
+        if semanal.empty:
+            st.warning("No hay calorías registradas.")
+        else:
+            imagen = resultados.obtener("grafica_calorias_semanales", (int(semanas),), versiones["calorias"],
+                                        lambda: renderizar_calorias_semanales(semanal))
+            st.image(imagen, use_column_width=True)
+            st.dataframe(semanal.reset_index().assign(semana=lambda df: df["semana"].dt.date), hide_index=True)
+
+    if st.button("Graficar Calorías vs Peso"):
+        graficar_calorias_vs_peso()
+
 elif opcion == "Gimnasio":
-    runpy.run_path("prueba.py")
+    runpy.run_path(os.path.join(DIRECTORIO_APP, "prueba.py"))
 
 elif opcion == "Progreso":
-    runpy.run_path("progress_app.py")
\ No newline at end of file
+    runpy.run_path(os.path.join(DIRECTORIO_APP, "progress_app.py"))
+
+elif opcion == "Tendencias":
+    # Traer las filas nuevas del registro de entrenamientos al almacén local
+    sincronizar_con_hoja(cargar_hoja(st.secrets["google_creds"]["spreadsheet_id"]))
+
+    periodo = st.selectbox("Periodo", list(FRECUENCIAS.keys()))
+    nivel = st.selectbox("Agrupar por", list(NIVELES.keys()))
+    metrica = st.selectbox("Métrica", list(METRICAS.keys()))
+    hoy = pd.Timestamp.today().normalize()
+    fecha_inicio = st.date_input("Desde", hoy - pd.DateOffset(months=6))
+    fecha_fin = st.date_input("Hasta", hoy)
+
+    # Solo se leen los meses del rango elegido; todas las métricas salen de una sola agregación, que se guarda en
+    # el caché de resultados mientras el almacén no cambie
+    def calcular_tabla_tendencias():
+        df_rango = consultar_registros(fecha_inicio, fecha_fin, columnas=["fecha", "grupo", "ejercicio", "kilos", "reps"])
+        return None if df_rango.empty else calcular_tendencias(df_rango, FRECUENCIAS[periodo], NIVELES[nivel])
+
+    tabla = resultados.obtener("tendencias", (fecha_inicio, fecha_fin, periodo, nivel), version_almacen(), calcular_tabla_tendencias)
+    if tabla is None:
+        st.warning("No hay entrenamientos en el rango seleccionado.")
+    else:
+        pivote = pivotear_tendencias(tabla, METRICAS[metrica], NIVELES[nivel], FRECUENCIAS[periodo])
+        graficar_tendencias(pivote, metrica, periodo)
+        st.dataframe(pivote)
+
+# Modo de perfil de memoria (PERFIL_MEMORIA_FIGURAS=1): bytes por gráfica renderizada en este proceso
+if perfil_memoria_activo():
+    with st.sidebar.expander("Memoria por gráfica"):
+        st.dataframe(reporte_memoria())
+
+# Aciertos y fallos del caché de resultados derivados (compartido por todas las sesiones del proceso)
+with st.sidebar.expander("Caché de resultados"):
+    estadisticas_cache, ocupacion_cache = resultados.estadisticas()
+    st.caption(f"{ocupacion_cache['entradas']} resultados, {ocupacion_cache['bytes'] / 1024:.0f} KB de "
+               f"{ocupacion_cache['bytes_maximo'] / 1024 / 1024:.0f} MB")
+    st.dataframe(estadisticas_cache, hide_index=True)
+
+# Métricas del planificador de llamadas a las hojas (compartido por todas las sesiones del proceso): cola de
+# llamadas esperando cuota, lecturas juntadas en una sola y reintentos
+with st.sidebar.expander("Llamadas a las hojas"):
+    metricas_hojas = obtener_planificador().metricas()
+    st.caption(f"{metricas_hojas['llamadas']} llamadas, {metricas_hojas['coalescidas']} lecturas coalescidas, "
+               f"{metricas_hojas['reintentos']} reintentos, {metricas_hojas['errores']} errores")
+    st.caption(f"{metricas_hojas['en_cola_total']} en cola, {metricas_hojas['en_vuelo']} lecturas en vuelo")
+    st.dataframe(
+        pd.DataFrame({"cubeta": list(metricas_hojas["en_cola"]), "en_cola": list(metricas_hojas["en_cola"].values())}),
+        hide_index=True
+    )
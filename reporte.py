@@ -0,0 +1,176 @@
+import argparse
+import html
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from agregados import calcular_max_por_dia
+from almacen_local import DIRECTORIO_ALMACEN, consultar_registros
+from calorias_peso import ARCHIVO_DIARIO, SEMANAS_CALORIAS, UMBRAL_CALORIAS_DIA, calorias_semanales
+from comparaciones import comparar_sesiones, construir_indice, sesion_anterior
+from graficas import renderizar_panel_max_por_dia, renderizar_promedio_semanal_peso
+
+# Reporte periódico sin Streamlit: lee el almacén local (entrenamientos) y la serie diaria (calorías y peso),
+# dibuja todas las gráficas en paralelo con varios procesos y escribe los PNG y un index.html en un directorio.
+# Uso: python reporte.py --salida reportes/2024-06 --desde 2024-06-01 --hasta 2024-06-30
+
+COLUMNAS_COMPARACION = ["ejercicio", "set_ordinal", "kilos_hoy", "reps_hoy", "norm_hoy", "kilos_antes", "reps_antes", "norm_antes"]
+
+
+# Nombre de archivo seguro a partir de un texto (ejercicio, grupo o lugar)
+def _nombre_archivo(texto):
+    return re.sub(r"[^0-9A-Za-z]+", "_", str(texto)).strip("_").lower() or "sin_nombre"
+
+
+# Paneles de peso máximo por día de cada (grupo, lugar, ejercicio), igual que en la página de Progreso
+def tareas_mosaicos(registros):
+    tareas = {}
+    if registros.empty:
+        return tareas
+    stats = calcular_max_por_dia(registros).rename(columns={"fecha_dia": "fecha", "kilos_max": "kilos"})
+    grupos = registros[["grupo", "location", "ejercicio"]].drop_duplicates()
+    for (grupo, location), df_grupo in grupos.groupby(["grupo", "location"], sort=True):
+        carpeta = os.path.join("mosaicos", _nombre_archivo(f"{grupo}_{location}"))
+        for ejercicio in sorted(df_grupo["ejercicio"]):
+            df_stats = stats[(stats["ejercicio"] == ejercicio) & (stats["location"] == location)].sort_values("fecha")
+            if df_stats.empty:
+                continue
+            ruta = os.path.join(carpeta, f"{_nombre_archivo(ejercicio)}.png")
+            tareas[ruta] = (renderizar_panel_max_por_dia, (ejercicio, df_stats))
+    return tareas
+
+
+# Serie diaria recortada al periodo del reporte
+def leer_diario(fecha_inicio=None, fecha_fin=None, archivo=ARCHIVO_DIARIO):
+    if not os.path.exists(archivo):
+        return pd.DataFrame()
+    diario = pd.read_parquet(archivo)
+    if fecha_inicio is not None:
+        diario = diario[diario.index >= pd.to_datetime(fecha_inicio)]
+    if fecha_fin is not None:
+        diario = diario[diario.index <= pd.to_datetime(fecha_fin)]
+    return diario
+
+
+# Mediciones de peso en el formato de la hoja de peso, para reutilizar la gráfica de promedio semanal
+def mediciones_peso(diario):
+    if diario.empty:
+        return pd.DataFrame(columns=["Fecha", "Peso en kg", "Porcentaje de grasa"])
+    mediciones = diario[["peso_kg", "grasa"]].dropna(subset=["peso_kg"]).reset_index()
+    mediciones.columns = ["Fecha", "Peso en kg", "Porcentaje de grasa"]
+    return mediciones
+
+
+# Promedio semanal (lunes a domingo) de calorías considerando solo los días con más de UMBRAL_CALORIAS_DIA
+def promedios_calorias(diario, semanas=SEMANAS_CALORIAS):
+    semanal = calorias_semanales(diario, semanas).reset_index()
+    semanal["semana"] = semanal["semana"].dt.date
+    return semanal
+
+
+# Última sesión de cada (grupo, lugar) contra la sesión anterior del mismo grupo y lugar
+def comparaciones_por_grupo(registros):
+    tablas = {}
+    if registros.empty:
+        return tablas
+    indice = construir_indice(registros)
+    for grupo, location in indice[["grupo", "location"]].drop_duplicates().sort_values(["grupo", "location"]).itertuples(index=False):
+        fecha_hoy = indice.loc[(indice["grupo"] == grupo) & (indice["location"] == location), "sesion"].max()
+        fecha_antes = sesion_anterior(indice, fecha_hoy, grupo, location)
+        if fecha_antes is None:
+            continue
+        tabla = comparar_sesiones(indice, fecha_hoy, fecha_antes, grupo=grupo, location=location)
+        tablas[(grupo, location, fecha_hoy, fecha_antes)] = tabla[COLUMNAS_COMPARACION]
+    return tablas
+
+
+def _renderizar(funcion, argumentos, dpi, ruta):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, "wb") as archivo:
+        archivo.write(funcion(*argumentos, dpi=dpi))
+    return ruta
+
+
+# Dibuja todas las gráficas repartidas entre los procesos; devuelve las rutas relativas que sí se escribieron
+def renderizar_en_paralelo(tareas, salida, procesos=None, dpi=200):
+    if not tareas:
+        return []
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        futuros = {
+            ejecutor.submit(_renderizar, funcion, argumentos, dpi, os.path.join(salida, ruta)): ruta
+            for ruta, (funcion, argumentos) in tareas.items()
+        }
+        return sorted(ruta for futuro, ruta in futuros.items() if futuro.result())
+
+
+def _html_tabla(df):
+    return df.to_html(index=False, float_format="{:.1f}".format, na_rep="-", border=0)
+
+
+def escribir_indice(salida, titulo, imagenes, calorias, comparaciones):
+    partes = [f"<h1>{html.escape(titulo)}</h1>"]
+
+    partes.append("<h2>Promedio semanal de peso y grasa</h2>")
+    if "peso_semanal.png" in imagenes:
+        partes.append('<img src="peso_semanal.png" width="800">')
+    else:
+        partes.append("<p>No hay mediciones de peso en el periodo.</p>")
+
+    partes.append(f"<h2>Calorías por semana (días con más de {UMBRAL_CALORIAS_DIA} kcal)</h2>")
+    partes.append(_html_tabla(calorias) if not calorias.empty else "<p>No hay calorías registradas en el periodo.</p>")
+
+    partes.append("<h2>Última sesión vs sesión anterior</h2>")
+    for (grupo, location, fecha_hoy, fecha_antes), tabla in comparaciones.items():
+        partes.append(f"<h3>{html.escape(f'{grupo} @ {location}')}: {fecha_hoy.date()} vs {fecha_antes.date()}</h3>")
+        partes.append(_html_tabla(tabla))
+
+    partes.append("<h2>Peso máximo por día</h2>")
+    carpetas = sorted({os.path.dirname(ruta) for ruta in imagenes if ruta.startswith("mosaicos")})
+    for carpeta in carpetas:
+        partes.append(f"<h3>{html.escape(os.path.basename(carpeta))}</h3><div>")
+        partes.extend(f'<img src="{ruta}" width="49%">' for ruta in imagenes if os.path.dirname(ruta) == carpeta)
+        partes.append("</div>")
+
+    ruta = os.path.join(salida, "index.html")
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        archivo.write(
+            '<!DOCTYPE html><html><head><meta charset="utf-8"><title>' + html.escape(titulo) + "</title>"
+            "<style>body{background:#0F1116;color:white;font-family:sans-serif}"
+            "table{border-collapse:collapse}td,th{padding:2px 8px;border-bottom:1px solid #595D73}</style>"
+            "</head><body>" + "\n".join(partes) + "</body></html>"
+        )
+    return ruta
+
+
+# Función para generar el reporte completo del periodo (todo el historial si no se dan fechas)
+def generar_reporte(salida, fecha_inicio=None, fecha_fin=None, procesos=None, dpi=200,
+                    directorio=DIRECTORIO_ALMACEN, archivo_diario=ARCHIVO_DIARIO):
+    os.makedirs(salida, exist_ok=True)
+    registros = consultar_registros(fecha_inicio=fecha_inicio, fecha_fin=fecha_fin, directorio=directorio)
+    for columna in ["kilos", "reps"]:
+        registros[columna] = pd.to_numeric(registros[columna], errors="coerce")
+    diario = leer_diario(fecha_inicio, fecha_fin, archivo_diario)
+
+    tareas = tareas_mosaicos(registros)
+    peso = mediciones_peso(diario)
+    if not peso.empty:
+        tareas["peso_semanal.png"] = (renderizar_promedio_semanal_peso, (peso,))
+    imagenes = renderizar_en_paralelo(tareas, salida, procesos, dpi)
+
+    inicio = pd.to_datetime(fecha_inicio).date() if fecha_inicio is not None else "inicio"
+    fin = pd.to_datetime(fecha_fin).date() if fecha_fin is not None else "hoy"
+    titulo = f"Reporte de progreso ({inicio} - {fin})"
+    return escribir_indice(salida, titulo, imagenes, promedios_calorias(diario), comparaciones_por_grupo(registros))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera el reporte periódico (PNG + HTML) desde el almacén local")
+    parser.add_argument("--salida", default="reporte")
+    parser.add_argument("--desde", default=None, help="Fecha inicial (AAAA-MM-DD)")
+    parser.add_argument("--hasta", default=None, help="Fecha final (AAAA-MM-DD)")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos para dibujar (por defecto uno por núcleo)")
+    parser.add_argument("--dpi", type=int, default=200)
+    args = parser.parse_args()
+    print(generar_reporte(args.salida, args.desde, args.hasta, args.procesos, args.dpi))
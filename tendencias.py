@@ -0,0 +1,41 @@
+import pandas as pd
+
+from comparaciones import normalizar_a_8_reps
+
+# Reporte de tendencias: tonelaje, sets, reps y carga normalizada por grupo o ejercicio en periodos semanales o mensuales
+FRECUENCIAS = {"Semanal": "W-SUN", "Mensual": "MS"}
+NIVELES = {"Grupo": "grupo", "Ejercicio": "ejercicio"}
+METRICAS = {
+    "Tonelaje (kg)": "tonelaje",
+    "Sets": "sets",
+    "Reps": "reps",
+    "Carga Norm. por Set (kg)": "carga_norm",
+}
+
+
+# Función para calcular todas las métricas de todos los periodos en una sola pasada vectorizada
+def calcular_tendencias(df, frecuencia="W-SUN", nivel="grupo"):
+    df = df[["fecha", nivel, "kilos", "reps"]].copy()
+    df["fecha"] = pd.to_datetime(df["fecha"])
+    df["kilos"] = pd.to_numeric(df["kilos"], errors="coerce").fillna(0)
+    df["reps"] = pd.to_numeric(df["reps"], errors="coerce").fillna(0)
+    df["tonelaje"] = df["kilos"] * df["reps"]
+    df["norm"] = normalizar_a_8_reps(df["kilos"], df["reps"])
+
+    return df.groupby([nivel, pd.Grouper(key="fecha", freq=frecuencia)]).agg(
+        tonelaje=("tonelaje", "sum"),
+        sets=("reps", "size"),
+        reps=("reps", "sum"),
+        carga_norm=("norm", "mean")
+    ).reset_index()
+
+
+# Función para pasar la tabla larga a una tabla periodo x (grupo|ejercicio). Los periodos sin entrenar
+# quedan en cero para las métricas acumuladas y vacíos para la carga normalizada (que es un promedio)
+def pivotear_tendencias(tabla, metrica, nivel="grupo", frecuencia="W-SUN"):
+    if tabla.empty:
+        return pd.DataFrame()
+    pivote = tabla.pivot(index="fecha", columns=nivel, values=metrica)
+    periodos = pd.date_range(pivote.index.min(), pivote.index.max(), freq=frecuencia)
+    pivote = pivote.reindex(periodos).rename_axis("fecha")
+    return pivote if metrica == "carga_norm" else pivote.fillna(0)